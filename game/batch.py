@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+''' PySpaceX batch runner
+
+Plays many seeded headless games on a pool of worker processes, one
+game object per worker, to compare candidate settings. Every setting
+given with --sweep multiplies the candidates, each candidate plays
+--games games:
+
+    python batch.py --games 1000 --sweep BONUS_ODD=0.9,0.95 \\
+        --set SHOTDELAY_MAX=150 --output runs/bonus
+
+Results are streamed as games end into one .npy column per metric in
+the output directory, next to candidates.json listing the settings of
+each candidate index:
+
+    np.load('runs/bonus/score.npy', mmap_mode='r')
+'''
+import argparse
+import ast
+import itertools
+import json
+import os
+import random
+import sys
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import settings
+
+# column: dtype, a row per game
+COLUMNS = (
+    ('candidate', np.uint16),
+    ('seed', np.uint32),
+    ('score', np.int32),
+    ('frames', np.int32),
+    ('kills', np.int32),
+    ('powerups', np.int32),
+    ('lives', np.int8),
+)
+INPUTS = ('bot', 'sweep')
+
+# the game of a worker process, reused from a job to the next
+game = None
+
+
+def override(values):
+    ''' set settings in every game module which imported them, return
+    the values replaced '''
+    here = os.path.dirname(os.path.abspath(__file__))
+    replaced = {}
+    for module in list(sys.modules.values()):
+        path = getattr(module, '__file__', None) or ''
+        if not os.path.abspath(path).startswith(here):
+            continue
+        for name, value in values.items():
+            if name in vars(module):
+                replaced.setdefault(name, getattr(module, name))
+                setattr(module, name, value)
+    return replaced
+
+
+def init_worker():
+    global game
+    from main import Game
+    game = Game(headless=True, render=False)
+
+
+def play(row, seed, values, input, max_frames):
+    ''' play one game with some settings replaced, return its row and
+    results '''
+    from engine.Input import BotInput, ScriptedInput, LEFT, RIGHT, SHOOT
+    replaced = override(values)
+    try:
+        if input == 'bot':
+            game.input = BotInput()
+        else:
+            game.input = ScriptedInput(
+                lambda frame: SHOOT | (LEFT if frame // 60 % 2 else RIGHT)
+            )
+        game.max_frames = max_frames
+        random.seed(seed)
+        game.new()
+    finally:
+        override(replaced)
+    return row, (game.score, game.frame, game.kills, game.powerups_caught,
+                 game.player.lives)
+
+
+def candidates(fixed, sweeps):
+    ''' settings of each candidate: fixed ones plus one combination of
+    the swept values '''
+    names = [name for name, _ in sweeps]
+    return [dict(fixed, **dict(zip(names, values)))
+            for values in itertools.product(*[values for _, values in sweeps])]
+
+
+def setting(text, parser):
+    ''' parse NAME=VALUE[,VALUE...] into the name and the values '''
+    name, _, values = text.partition('=')
+    if not hasattr(settings, name):
+        parser.error('unknown setting {}'.format(name))
+    try:
+        values = ast.literal_eval('[{}]'.format(values))
+    except (SyntaxError, ValueError):
+        parser.error('invalid value in {}'.format(text))
+    if not values:
+        parser.error('no value in {}'.format(text))
+    return name, values
+
+
+def main():
+    parser = argparse.ArgumentParser(description='PySpaceX batch runner')
+    parser.add_argument('--games', type=int, default=100,
+                        help='games played per candidate')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='seed of the first game of each candidate')
+    parser.add_argument('--set', action='append', default=[],
+                        metavar='NAME=VALUE', help='setting of all games')
+    parser.add_argument('--sweep', action='append', default=[],
+                        metavar='NAME=VALUE,...',
+                        help='a candidate per value of this setting')
+    parser.add_argument('--input', choices=INPUTS, default='bot',
+                        help='bot, or sweep left and right firing')
+    parser.add_argument('--max-frames', type=int, default=settings.FPS * 600,
+                        help='stop a game after that many frames, '
+                        '10 minutes by default')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='worker processes, one per core by default')
+    parser.add_argument('--output', required=True,
+                        help='directory the result columns are written to')
+    args = parser.parse_args()
+
+    fixed = {}
+    for text in args.set:
+        name, values = setting(text, parser)
+        if len(values) > 1:
+            parser.error('use --sweep for several values of {}'.format(name))
+        fixed[name] = values[0]
+    jobs = candidates(fixed, [setting(text, parser) for text in args.sweep])
+
+    os.makedirs(args.output, exist_ok=True)
+    with open(os.path.join(args.output, 'candidates.json'), 'w') as f:
+        json.dump(jobs, f, indent=2)
+    rows = len(jobs) * args.games
+    columns = {
+        name: np.lib.format.open_memmap(
+            os.path.join(args.output, name + '.npy'), mode='w+',
+            dtype=dtype, shape=(rows,))
+        for name, dtype in COLUMNS
+    }
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(args.workers, initializer=init_worker) as pool:
+        futures = []
+        for candidate, values in enumerate(jobs):
+            for index in range(args.games):
+                row = candidate * args.games + index
+                seed = args.seed + index
+                columns['candidate'][row] = candidate
+                columns['seed'][row] = seed
+                futures.append(pool.submit(play, row, seed, values,
+                                           args.input, args.max_frames))
+        for done, future in enumerate(as_completed(futures), 1):
+            row, results = future.result()
+            for (name, _), value in zip(COLUMNS[2:], results):
+                columns[name][row] = value
+            if done % 100 == 0 or done == rows:
+                print("{}/{} games, {:.1f} s".format(
+                    done, rows, time.perf_counter() - start), file=sys.stderr)
+
+    for column in columns.values():
+        column.flush()
+
+    print("{:<4}{:>10}{:>12}{:>8}{:>10}  {}".format(
+        '', 'score', 'survival s', 'kills', 'powerups', 'settings'))
+    for candidate, values in enumerate(jobs):
+        games = columns['candidate'] == candidate
+        print("{:<4}{:>10.1f}{:>12.1f}{:>8.1f}{:>10.2f}  {}".format(
+            candidate, columns['score'][games].mean(),
+            columns['frames'][games].mean() / settings.FPS,
+            columns['kills'][games].mean(),
+            columns['powerups'][games].mean(),
+            values))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+''' PySpaceX benchmarks
+
+Plays scripted scenarios with fixed seeds on the SDL dummy drivers and
+reports frame time percentiles, the time spent in each phase of a frame
+and microbenchmarks of single subsystems. Results are written as JSON
+and can be compared against a previous run:
+
+    python benchmark.py --output base.json
+    python benchmark.py --baseline base.json
+
+Replays recorded with main.py --record can be added as workloads with
+--replay.
+'''
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import numpy as np
+import pygame as pg
+
+from settings import *
+from main import Game
+from engine.Input import ReplayInput, ScriptedInput, LEFT, RIGHT, SHOOT
+from engine.Replay import Replay
+from engine.RotationCache import RotationCache
+from engine.SpatialHash import SpatialHash, collide_mask
+from engine.SurfaceFormats import FORMATS
+from engine.Telemetry import Telemetry
+from sprites.Explosion import Explosion
+from sprites.Starfield import Starfield
+
+PERCENTILES = (50, 95, 99)
+
+
+def mobs(count, swarm=None):
+    def setup(game):
+        game.reset(mobs=count, swarm=swarm)
+    return setup
+
+
+def bullet_storm(game):
+    game.reset()
+    game.input = ScriptedInput(
+        lambda frame: SHOOT | (LEFT if frame // 60 % 2 else RIGHT)
+    )
+
+
+def bullet_storm_frame(game):
+    # power level 2 firing every frame and a player that never dies
+    game.player.power_level = 2
+    game.player.shot_delay = 0
+    game.player.shield = SHIELD_MAX
+
+
+def explosions_frame(game):
+    # keep 200 explosions alive at any time
+    explosions = [sprite for sprite in game.all_sprites
+                  if isinstance(sprite, Explosion)]
+    for _ in range(200 - len(explosions)):
+        center = (random.randrange(WIDTH), random.randrange(HEIGHT))
+        size = random.choice(['large', 'small'])
+        game.all_sprites.add(Explosion(game, center, size))
+
+
+# name: (setup, called before every frame)
+SCENARIOS = {
+    'mobs_8': (mobs(8), None),
+    'mobs_100': (mobs(100), None),
+    'mobs_1000': (mobs(1000, swarm=False), None),
+    'swarm_1000': (mobs(1000, swarm=True), None),
+    'swarm_5000': (mobs(5000, swarm=True), None),
+    'bullet_storm': (bullet_storm, bullet_storm_frame),
+    'explosions': (mobs(MOBS_INIT), explosions_frame),
+}
+
+
+def stats(samples):
+    ''' summary of timings given in seconds, reported in milliseconds '''
+    samples = np.asarray(samples) * 1000
+    summary = {'mean': float(samples.mean()), 'max': float(samples.max())}
+    for percentile in PERCENTILES:
+        summary['p{}'.format(percentile)] = float(
+            np.percentile(samples, percentile)
+        )
+    return summary
+
+
+def timed(method, samples):
+    ''' wrap method so each call duration is added to samples[-1] '''
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        result = method(*args, **kwargs)
+        samples[-1] += time.perf_counter() - start
+        return result
+    return wrapper
+
+
+def run_scenario(game, name, frames, seed, input):
+    setup, per_frame = SCENARIOS[name]
+    random.seed(seed)
+    game.input = input
+    setup(game)
+
+    # time the phases of Game.step by wrapping them on this instance
+    phases = {}
+    wrapped = (
+        ('draw', game, 'draw'),
+        ('starfield', game.renderer, 'draw_stars'),
+        ('sprites', game, '_draw_sprites'),
+        ('present', game.renderer, 'present'),
+        ('collisions', game, '_detect_collisions'),
+        ('events', game, 'events'),
+        ('update', game, 'update'))
+    for phase, owner, method in wrapped:
+        phases[phase] = []
+        setattr(owner, method, timed(getattr(owner, method), phases[phase]))
+
+    frame_times = []
+    for _ in range(frames):
+        for samples in phases.values():
+            samples.append(0.0)
+        if per_frame is not None:
+            per_frame(game)
+        start = time.perf_counter()
+        game.step()
+        frame_times.append(time.perf_counter() - start)
+
+    # back to the class methods
+    for phase, owner, method in wrapped:
+        delattr(owner, method)
+
+    return {
+        'frames': frames,
+        'frame_ms': stats(frame_times),
+        'phases_ms': {phase: stats(samples)
+                      for phase, samples in phases.items()},
+        'sprites': len(game.all_sprites),
+        'swarm': len(game.swarm) if game.swarm is not None else 0,
+        'pools': {name: pool.stats() for name, pool in game.pools.items()},
+        'sounds': game.audio.stats,
+    }
+
+
+def microbench(function, repeat, number):
+    ''' time number calls of function, repeat times, per call '''
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        samples.append((time.perf_counter() - start) / number)
+    return stats(samples)
+
+
+def run_microbenchmarks(game, seed):
+    random.seed(seed)
+    results = {}
+    surface = pg.Surface((WIDTH, HEIGHT)).convert()
+
+    for count in (200, 20000):
+        starfield = Starfield(count)
+        results['starfield_{}'.format(count)] = microbench(
+            lambda: starfield.draw_stars(surface), 20, 10
+        )
+
+    cache = RotationCache(ROTATION_STEPS, ROTATION_CACHE_SIZE)
+    cache.warm(game.meteors_img)
+    angles = [random.uniform(0, 360) for _ in range(1000)]
+    image = game.meteors_img[0]
+    results['rotation_cache_1000'] = microbench(
+        lambda: [cache.get(image, angle) for angle in angles], 20, 1
+    )
+    results['rotate_1000'] = microbench(
+        lambda: [pg.transform.rotate(image, angle) for angle in angles], 5, 1
+    )
+
+    results['draw_text_glyphs'] = microbench(
+        lambda: Game.draw_text(surface, "Score = {}".format(random.random()),
+                               20, (WIDTH / 2, 10), glyphs=True),
+        20, 100
+    )
+
+    game.reset(mobs=1000, swarm=False)
+    grid = SpatialHash(GRID_CELL_SIZE)
+    results['spatial_hash_rebuild_1000'] = microbench(
+        lambda: grid.rebuild(game.mobs), 20, 1
+    )
+    results['spatial_hash_query'] = microbench(
+        lambda: grid.query(game.player.rect), 20, 100
+    )
+
+    # narrow phase of the player against every mob, most of them far
+    mobs = game.mobs.sprites()
+    results['collide_circle_1000'] = microbench(
+        lambda: [pg.sprite.collide_circle(game.player, mob) for mob in mobs],
+        20, 1
+    )
+    results['collide_mask_1000'] = microbench(
+        lambda: [collide_mask(game.player, mob) for mob in mobs], 20, 1
+    )
+
+    # 100 blits of an image of each class in each format, on screen
+    positions = [(random.randrange(WIDTH), random.randrange(HEIGHT))
+                 for _ in range(100)]
+    images = {
+        'background': game.background,
+        'player': game.player_img,
+        'laser': game.laser_img,
+        'meteors': game.rotation_cache.get(game.meteors_img[0], 30),
+        'powerups': game.powerups_img['shield'],
+        'explosions': game.explosions_anim['large'][0],
+    }
+    for name, image in images.items():
+        for format in FORMATS:
+            blits = [(game.formats.convert(image.copy(), format), position)
+                     for position in positions]
+            results['blit_{}_{}'.format(name, format)] = microbench(
+                lambda blits=blits: surface.blits(blits, doreturn=False),
+                5 if name == 'background' else 20, 1
+            )
+
+    # telemetry on the game loop, then one batch saved by its thread
+    game.start_telemetry()
+    results['telemetry_record'] = microbench(
+        game._record_telemetry, 20, 1000
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        telemetry = Telemetry(os.path.join(directory, 'telemetry'),
+                              TELEMETRY_CAPACITY, TELEMETRY_BATCH)
+        telemetry.rows[:] = game.telemetry.rows
+        telemetry.head = TELEMETRY_CAPACITY
+        results['telemetry_save_batch'] = microbench(
+            lambda: telemetry._save(telemetry.saved + TELEMETRY_BATCH), 5, 1
+        )
+        telemetry.close()
+    game.stop_telemetry()
+    return results
+
+
+def compare(results, baseline, threshold):
+    ''' print frame time changes against baseline, return the regressions '''
+    regressions = []
+    print("{:<16}{:>8}{:>12}{:>12}{:>9}".format(
+        'scenario', 'metric', 'baseline', 'current', 'ratio'))
+    for name, scenario in sorted(results['scenarios'].items()):
+        if name not in baseline['scenarios']:
+            continue
+        before = baseline['scenarios'][name]['frame_ms']
+        for percentile in PERCENTILES:
+            metric = 'p{}'.format(percentile)
+            ratio = scenario['frame_ms'][metric] / before[metric]
+            flag = ''
+            if ratio > 1 + threshold:
+                flag = '  <-- regression'
+                regressions.append((name, metric, ratio))
+            print("{:<16}{:>8}{:>12.3f}{:>12.3f}{:>9.2f}{}".format(
+                name, metric, before[metric], scenario['frame_ms'][metric],
+                ratio, flag))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='PySpaceX benchmarks')
+    parser.add_argument('--frames', type=int, default=600,
+                        help='frames played per scenario')
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--scenario', action='append',
+                        choices=sorted(SCENARIOS),
+                        help='scenario to run, all of them by default')
+    parser.add_argument('--replay', action='append', default=[],
+                        help='replay file played as a scenario named '
+                        'after it, up to --frames frames')
+    parser.add_argument('--no-micro', action='store_true',
+                        help='skip the microbenchmarks')
+    parser.add_argument('--output', help='write the results to this file')
+    parser.add_argument('--baseline', help='results to compare against')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='slowdown ratio reported as a regression')
+    parser.add_argument('--backend', choices=('surface', 'texture',
+                                              'software'),
+                        help='render backend, see BACKEND')
+    parser.add_argument('--scale', type=float,
+                        help='window scale of the texture backends')
+    args = parser.parse_args()
+
+    game = Game(headless=True, backend=args.backend, scale=args.scale)
+    bot = game.input
+    results = {
+        'meta': {
+            'python': platform.python_version(),
+            'pygame': pg.version.ver,
+            'platform': platform.platform(),
+            'renderer': type(game.renderer).__name__,
+            'scale': args.scale or WINDOW_SCALE,
+            'seed': args.seed,
+            'frames': args.frames,
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'scenarios': {},
+        'micro': {},
+    }
+
+    runs = [(name, args.frames, args.seed, bot)
+            for name in args.scenario or sorted(SCENARIOS)]
+    for path in args.replay:
+        replay = Replay.load(path)
+        name = 'replay_' + os.path.splitext(os.path.basename(path))[0]
+        SCENARIOS[name] = (lambda game: game.reset(), None)
+        runs.append((name, min(args.frames, len(replay)), replay.seed,
+                     ReplayInput(replay)))
+    for name, frames, seed, input in runs:
+        result = run_scenario(game, name, frames, seed, input)
+        results['scenarios'][name] = result
+        frame_ms = result['frame_ms']
+        print("{:<16} p50 {:7.3f} ms  p95 {:7.3f} ms  p99 {:7.3f} ms".format(
+            name, frame_ms['p50'], frame_ms['p95'], frame_ms['p99']))
+
+    if not args.no_micro:
+        results['micro'] = run_microbenchmarks(game, args.seed)
+        for name, micro in sorted(results['micro'].items()):
+            print("{:<28} p50 {:10.2f} us".format(name, micro['p50'] * 1000))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+
+    pg.quit()
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+import heapq
+
+
+class Animator(object):
+    ''' Animation clock and timers of the sprites
+
+    The game time is sampled once per step by tick() and sprites read
+    it from now. Instead of checking every frame whether their delay
+    elapsed, sprites ask to be called back once more than delay ms have
+    passed and update() fires all the timers due in a single pass.
+    Steps fall on a few distinct times so timers are kept in a bucket
+    per due time, in the order they were set, and only the due times
+    are kept in a heap. A cancelled timer stays in its bucket and is
+    skipped.
+    '''
+    def __init__(self, clock):
+        self.clock = clock
+        self.now = clock.get_ticks()
+        # [callback] lists by due time, and the heap of their due times
+        self.buckets = {}
+        self.dues = []
+        # frame sequences by name, resolved once
+        self.sequences = {}
+        self.fired = 0
+
+    def reset(self):
+        ''' forget every timer and sample the clock again '''
+        self.buckets = {}
+        self.dues = []
+        self.tick()
+
+    def tick(self):
+        ''' sample the game time of the step '''
+        self.now = self.clock.get_ticks()
+
+    def after(self, delay, callback):
+        ''' call callback() once more than delay ms have elapsed from
+        now, return the timer '''
+        due = self.now + delay + 1
+        timer = [callback]
+        bucket = self.buckets.get(due)
+        if bucket is None:
+            bucket = self.buckets[due] = []
+            heapq.heappush(self.dues, due)
+        bucket.append(timer)
+        return timer
+
+    @staticmethod
+    def cancel(timer):
+        if timer is not None:
+            timer[0] = None
+
+    def update(self):
+        ''' fire the timers due, callbacks may set new timers '''
+        dues = self.dues
+        now = self.now
+        while dues and dues[0] <= now:
+            for timer in self.buckets.pop(heapq.heappop(dues)):
+                callback = timer[0]
+                if callback is not None:
+                    self.fired += 1
+                    callback()
+
+    def sequence(self, frames, name):
+        ''' frames[name] as a tuple, looked up the first time only '''
+        sequence = self.sequences.get(name)
+        if sequence is None:
+            sequence = tuple(frames[name])
+            # frames still loading are stood in for until they are there
+            if name in frames:
+                self.sequences[name] = sequence
+        return sequence
@@ -0,0 +1,132 @@
+import json
+import mmap
+import os
+import pygame as pg
+from collections import OrderedDict
+
+
+class AssetCache(object):
+    ''' Converted images packed in an atlas cached on disk
+
+    The atlas pixels are stored raw (RGB) next to a JSON manifest giving
+    the area of each image and the size and modification time of the
+    source files. Loading memory-maps the pixels and converts the atlas
+    in one go, so no PNG has to be decoded. The cache is discarded as
+    soon as a source file changes, or the params the images were derived
+    with, which have to be JSON serializable. VERSION is bumped whenever
+    what is cached changes in a way params don't tell.
+    '''
+    VERSION = 2
+
+    def __init__(self, path, sources, width, params=None):
+        self.path = path
+        self.sources = sources
+        self.width = width
+        # compared to the manifest as read back from JSON
+        self.params = json.loads(json.dumps(params))
+        self.manifest_path = os.path.join(path, 'atlas.json')
+        self.pixels_path = os.path.join(path, 'atlas.bin')
+
+    def signature(self):
+        signature = {}
+        for source in self.sources:
+            stat = os.stat(source)
+            signature[source] = [stat.st_size, stat.st_mtime_ns]
+        return signature
+
+    def manifest(self):
+        ''' manifest of the cache, None if it is missing or stale '''
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+            if manifest['version'] == AssetCache.VERSION and \
+               manifest['sources'] == self.signature() and \
+               manifest['params'] == self.params:
+                return manifest
+        except (OSError, ValueError, KeyError):
+            pass
+        return None
+
+    def read(self):
+        ''' map the atlas pixels in memory, can run on any thread '''
+        with open(self.pixels_path, 'rb') as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def unpack(self, manifest, pixels):
+        ''' convert the mapped atlas and split it back into images '''
+        try:
+            size = tuple(manifest['size'])
+            if len(pixels) != size[0] * size[1] * 3:
+                return None
+            # the raw surface shares the mapped memory and must be gone
+            # before the map is closed
+            raw = pg.image.frombuffer(pixels, size, 'RGB')
+            atlas = raw.convert()
+            del raw
+        finally:
+            pixels.close()
+
+        images = OrderedDict()
+        for name, x, y, width, height in manifest['entries']:
+            images[name] = atlas.subsurface((x, y, width, height)).copy()
+        return images
+
+    def load(self):
+        ''' images of the cache by name, None if it is missing or stale '''
+        manifest = self.manifest()
+        if manifest is None:
+            return None
+        try:
+            pixels = self.read()
+        except (OSError, ValueError):
+            return None
+        return self.unpack(manifest, pixels)
+
+    def save(self, images):
+        ''' pack the images and write the cache, errors are ignored as
+        the game can still run without it '''
+        atlas, entries = self.pack(images)
+        manifest = {
+            'version': AssetCache.VERSION,
+            'sources': self.signature(),
+            'params': self.params,
+            'size': atlas.get_size(),
+            'entries': entries,
+        }
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            # write then rename so a crash never leaves a half written cache
+            with open(self.pixels_path + '.tmp', 'wb') as f:
+                f.write(pg.image.tobytes(atlas, 'RGB'))
+            with open(self.manifest_path + '.tmp', 'w') as f:
+                json.dump(manifest, f)
+            os.replace(self.pixels_path + '.tmp', self.pixels_path)
+            os.replace(self.manifest_path + '.tmp', self.manifest_path)
+        except OSError:
+            pass
+
+    def pack(self, images):
+        ''' shelf packing: images sorted by height are laid out in rows '''
+        entries = []
+        x = y = row_height = 0
+        by_height = sorted(images.items(),
+                           key=lambda item: item[1].get_height(),
+                           reverse=True)
+        for name, image in by_height:
+            width, height = image.get_size()
+            if x + width > self.width:
+                y += row_height
+                x = row_height = 0
+            entries.append((name, x, y, width, height))
+            x += width
+            row_height = max(row_height, height)
+
+        atlas = pg.Surface((self.width, y + row_height))
+        for name, x, y, width, height in entries:
+            # colorkeyed pixels are skipped but they are black, just
+            # like the atlas background
+            atlas.blit(images[name], (x, y))
+        # keep the images in their original order
+        order = {name: i for i, name in enumerate(images)}
+        entries.sort(key=lambda entry: order[entry[0]])
+        return atlas, entries
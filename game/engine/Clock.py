@@ -0,0 +1,62 @@
+import time
+
+
+class SimClock(object):
+    ''' simulated clock, the game advances its time by exactly one step
+    at a time and ticks return immediately as if a frame had elapsed,
+    so the game runs as fast as the CPU allows '''
+    def __init__(self):
+        self.ticks = 0.0
+
+    def reset(self):
+        ''' start again from 0 '''
+        self.ticks = 0.0
+
+    def advance(self, fps):
+        ''' advance time by one step '''
+        self.ticks += 1000.0 / fps
+
+    def tick(self, fps):
+        ''' wait for the next frame, return the real time elapsed '''
+        return 1000.0 / fps
+
+    def get_ticks(self):
+        return int(self.ticks)
+
+
+class PacedClock(SimClock):
+    ''' simulated clock whose frames are paced in real time, the game
+    time only depends on the number of steps played so the same inputs
+    always play the same game
+
+    Waiting for a frame sleeps until spin ms before it is due then
+    spins for the rest: sleeps wake up late by up to a scheduler tick,
+    spinning the last bit makes frames much more regular than
+    pg.time.Clock at the cost of spin ms of CPU a frame. '''
+    def __init__(self, spin=1.0):
+        SimClock.__init__(self)
+        self.spin = spin / 1000.0
+        self.last = self.due = time.perf_counter()
+
+    def reset(self):
+        SimClock.reset(self)
+        # real time is measured from now on
+        self.last = self.due = time.perf_counter()
+
+    def tick(self, fps):
+        now = time.perf_counter()
+        # frames are due on a fixed schedule so that waking up late
+        # doesn't push back the next ones
+        self.due = self.due + 1.0 / fps if fps else now
+        if self.due < now:
+            # too late, start again from now
+            self.due = now
+        remaining = self.due - now
+        if remaining > self.spin:
+            time.sleep(remaining - self.spin)
+        while time.perf_counter() < self.due:
+            pass
+        now = time.perf_counter()
+        elapsed = now - self.last
+        self.last = now
+        return elapsed * 1000.0
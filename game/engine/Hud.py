@@ -0,0 +1,53 @@
+import pygame as pg
+
+
+class Widget(object):
+    ''' part of the HUD painted on its own surface
+
+    value is called every frame and paint(surface, value) only when
+    the value changed since the last paint, the surface being cleared
+    beforehand. Coordinates given to paint are relative to rect.
+    '''
+    def __init__(self, rect, value, paint):
+        self.rect = pg.Rect(rect)
+        self.value = value
+        self.paint = paint
+        self.surface = pg.Surface(self.rect.size, pg.SRCALPHA)
+        # never equal to a value so the first frame paints the widget
+        self.painted = object()
+        self.paints = 0
+
+    def refresh(self):
+        value = self.value()
+        if value != self.painted:
+            self.surface.fill((0, 0, 0, 0))
+            self.paint(self.surface, value)
+            self.painted = value
+            self.paints += 1
+
+
+class Hud(object):
+    ''' Retained head-up display
+
+    Widgets keep what they show on their own surface and only repaint
+    it when the value they watch changes, drawing the HUD is then a
+    single blits call of all the widgets surfaces.
+    '''
+    def __init__(self):
+        self.widgets = []
+
+    def add(self, rect, value, paint):
+        widget = Widget(rect, value, paint)
+        self.widgets.append(widget)
+        return widget
+
+    def refresh(self):
+        ''' repaint the widgets whose value changed '''
+        for widget in self.widgets:
+            widget.refresh()
+
+    def draw(self, surface):
+        ''' refresh the widgets and draw them, return their rects '''
+        self.refresh()
+        return surface.blits([(widget.surface, widget.rect)
+                              for widget in self.widgets])
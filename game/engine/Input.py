@@ -0,0 +1,83 @@
+''' Input sources driving the player
+
+An input source is polled once per frame and returns a bit mask of the
+actions requested for that frame, so the player can be driven by the
+keyboard, a script or a bot alike.
+'''
+import pygame as pg
+
+# keys held down
+LEFT = 1
+RIGHT = 2
+SHOOT = 4
+# space bar pressed during the frame
+FIRE = 8
+
+
+class KeyboardInput(object):
+    def poll(self, game, events):
+        keys = pg.key.get_pressed()
+        state = 0
+        if keys[pg.K_LEFT]:
+            state |= LEFT
+        if keys[pg.K_RIGHT]:
+            state |= RIGHT
+        if keys[pg.K_SPACE]:
+            state |= SHOOT
+        for event in events:
+            if event.type == pg.KEYDOWN and event.key == pg.K_SPACE:
+                state |= FIRE
+        return state
+
+
+class ScriptedInput(object):
+    ''' replay a script: either a sequence of states, one per frame
+    (the last one is held once the script ends), or a callable taking
+    the frame number and returning the state '''
+    def __init__(self, script):
+        self.script = script
+
+    def poll(self, game, events):
+        if callable(self.script):
+            return self.script(game.frame)
+        if not self.script:
+            return 0
+        return self.script[min(game.frame, len(self.script) - 1)]
+
+
+class BotInput(object):
+    ''' keep shooting and move under the closest mob coming down '''
+    def poll(self, game, events):
+        player = game.player
+        state = SHOOT
+        mobs = [mob for mob in game.mobs if mob.rect.bottom < player.rect.top]
+        if mobs:
+            target = max(mobs, key=lambda mob: mob.rect.bottom)
+            if target.rect.centerx < player.rect.centerx - 10:
+                state |= LEFT
+            elif target.rect.centerx > player.rect.centerx + 10:
+                state |= RIGHT
+        return state
+
+
+class RecordingInput(object):
+    ''' poll another input source and append its states to a replay '''
+    def __init__(self, source, replay):
+        self.source = source
+        self.replay = replay
+
+    def poll(self, game, events):
+        state = self.source.poll(game, events)
+        self.replay.append(state)
+        return state
+
+
+class ReplayInput(object):
+    ''' play back the states of a replay, nothing once it ends '''
+    def __init__(self, replay):
+        self.states = list(replay.states())
+
+    def poll(self, game, events):
+        if game.frame < len(self.states):
+            return self.states[game.frame]
+        return 0
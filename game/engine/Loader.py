@@ -0,0 +1,98 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Loader(object):
+    ''' Staged asset loader
+
+    Files are read and decoded on a thread pool while the main thread
+    keeps drawing. Each step may come with a finish callback run on the
+    main thread (for what needs the display, like convert()) when poll()
+    sees the step done. Callbacks registered with then() run once every
+    step is finished.
+    '''
+    def __init__(self, workers):
+        self.executor = ThreadPoolExecutor(workers)
+        self.pending = []
+        self.callbacks = []
+        self.total = 0
+        self.done = 0
+
+    @property
+    def finished(self):
+        return not self.pending and not self.callbacks
+
+    def add(self, load, finish=None):
+        ''' run load() on a worker then finish(result) on the main thread '''
+        self.pending.append((self.executor.submit(load), finish))
+        self.total += 1
+
+    def then(self, callback):
+        self.callbacks.append(callback)
+
+    def lazy(self, load, finish=None):
+        ''' start loading in the background, return the LazyAsset '''
+        return LazyAsset(self.executor.submit(load), finish)
+
+    def poll(self):
+        ''' finish the loaded steps, return the progress from 0 to 1 '''
+        pending, self.pending = self.pending, []
+        for future, finish in pending:
+            if future.done():
+                self._finish(future, finish)
+            else:
+                self.pending.append((future, finish))
+        if not self.pending:
+            self._complete()
+        return self.done / self.total if self.total else 1.0
+
+    def wait(self):
+        ''' block until every step is finished '''
+        while self.pending:
+            future, finish = self.pending.pop(0)
+            self._finish(future, finish)
+        self._complete()
+
+    def _finish(self, future, finish):
+        result = future.result()
+        if finish is not None:
+            finish(result)
+        self.done += 1
+
+    def _complete(self):
+        callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            callback()
+
+
+class LazyAsset(object):
+    ''' asset loading in the background, calling it gives the finished
+    asset and waits for it if it isn't loaded yet '''
+    def __init__(self, future, finish=None):
+        self.future = future
+        self.finish = finish
+
+    @property
+    def done(self):
+        return self.future.done()
+
+    def __call__(self):
+        result = self.future.result()
+        return self.finish(result) if self.finish is not None else result
+
+
+class LazyAssets(dict):
+    ''' dict of assets, the ones missing are loaded on first access
+    through the LazyAsset given for their name in loaders. Until it is
+    loaded an asset with a fallback is stood in for by the fallback
+    instead of waiting for it, and isn't kept. '''
+    def __init__(self, loaders, fallbacks=None):
+        dict.__init__(self)
+        self.loaders = loaders
+        self.fallbacks = fallbacks or {}
+
+    def __missing__(self, name):
+        loader = self.loaders[name]
+        if not loader.done and name in self.fallbacks:
+            return self.fallbacks[name]
+        value = self[name] = self.loaders.pop(name)()
+        return value
@@ -0,0 +1,310 @@
+''' Networked play over UDP
+
+The server runs the only real game and a client only sends its input
+state each step: the server plays the inputs of each of the first
+clients to connect on a ship of their own and sends every client a
+snapshot of the game each step, delta encoded against the last snapshot
+that client acknowledged. Sockets are
+served by an asyncio loop on a thread of their own, packets are handed
+to and from the game loop through deques.
+'''
+import asyncio
+import collections
+import random
+import struct
+import threading
+import time
+
+from engine.Input import FIRE
+from engine.Snapshot import NO_SHIP, Snapshot
+
+# packet type, last snapshot received, tick of the first state, count
+INPUT = struct.Struct('<BIIB')
+INPUTS = 2
+
+
+class _Protocol(asyncio.DatagramProtocol):
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+
+    def datagram_received(self, data, address):
+        self.endpoint.bytes_received += len(data)
+        self.endpoint.inbox.append((data, address))
+
+
+class Endpoint(object):
+    ''' UDP socket served by an asyncio loop on a daemon thread '''
+    def __init__(self, local=None, remote=None):
+        self.inbox = collections.deque()
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.loop = asyncio.new_event_loop()
+        self.error = None
+        ready = threading.Event()
+        self.thread = threading.Thread(target=self._serve,
+                                       args=(local, remote, ready),
+                                       daemon=True)
+        self.thread.start()
+        ready.wait()
+        if self.error is not None:
+            raise self.error
+
+    def _serve(self, local, remote, ready):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.transport, _ = self.loop.run_until_complete(
+                self.loop.create_datagram_endpoint(
+                    lambda: _Protocol(self),
+                    local_addr=local, remote_addr=remote))
+        except OSError as error:
+            self.error = error
+            ready.set()
+            return
+        ready.set()
+        self.loop.run_forever()
+        self.transport.close()
+        self.loop.run_until_complete(asyncio.sleep(0))
+        self.loop.close()
+
+    def send(self, data, address=None):
+        ''' send from any thread '''
+        self.bytes_sent += len(data)
+        self.loop.call_soon_threadsafe(self.transport.sendto, data, address)
+
+    def close(self):
+        if self.thread.is_alive():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+
+
+class Peer(object):
+    ''' what the server knows of a client '''
+    def __init__(self):
+        # snapshots sent by sequence, the client acknowledges them
+        self.sent = {}
+        self.ack = 0
+        # last input tick received
+        self.tick = 0
+        self.heard = time.monotonic()
+        # seat of the ship the client plays, None while it watches
+        self.seat = None
+
+
+class Seat(object):
+    ''' Input source of one ship of the server's game
+
+    The ship is played by the inputs of the client seated, when inputs
+    pile up the oldest ones are dropped to keep the latency down, when
+    none arrived the last state is held. The ship is out of the game
+    while the seat is free.
+    '''
+    def __init__(self, server, index):
+        self.server = server
+        self.index = index
+        # address of the client seated
+        self.address = None
+        # (tick, state) received and not played yet
+        self.pending = collections.deque()
+        self.state = 0
+        # tick of the last input state played
+        self.input_ack = 0
+
+    def take(self, address):
+        self.address = address
+        self.pending.clear()
+        self.state = 0
+        self.input_ack = 0
+
+    def poll(self, game, events):
+        self.server.receive()
+        ship = game.players[self.index]
+        if self.address is None:
+            if ship.playing:
+                ship.leave()
+            self.state = 0
+            return self.state
+        if not ship.playing:
+            ship.join()
+        while len(self.pending) > self.server.backlog:
+            self.pending.popleft()
+        if self.pending:
+            self.input_ack, self.state = self.pending.popleft()
+        else:
+            # keys stay held until the next state comes but a shot is
+            # only fired by the state which brought it
+            self.state &= ~FIRE
+        return self.state
+
+
+class NetServer(Endpoint):
+    ''' Authoritative side, its seats are the input sources of the ships
+
+    A client takes the first free seat when it connects, the clients
+    coming once every seat is taken watch and take the next seat freed.
+    Every step the game polls the input state of each seat and sends a
+    snapshot through send_snapshot. Clients silent for timeout seconds
+    are forgotten and free their seat.
+    '''
+    def __init__(self, port, host='0.0.0.0', history=64, backlog=2,
+                 timeout=2.0, seats=1):
+        Endpoint.__init__(self, local=(host, port))
+        self.peers = collections.OrderedDict()
+        self.seats = [Seat(self, index) for index in range(seats)]
+        self.history = history
+        self.backlog = backlog
+        self.timeout = timeout
+        self.snapshots = {'full': 0, 'delta': 0}
+
+    def wait(self, timeout=None):
+        ''' wait for the first client, return whether one connected '''
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.inbox:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def receive(self):
+        ''' take the packets received, seat new clients and forget the
+        silent ones '''
+        while self.inbox:
+            data, address = self.inbox.popleft()
+            if len(data) < INPUT.size or data[0] != INPUTS:
+                continue
+            _, ack, tick, count = INPUT.unpack_from(data)
+            peer = self.peers.get(address)
+            if peer is None:
+                peer = self.peers[address] = Peer()
+            peer.ack = max(peer.ack, ack)
+            peer.heard = time.monotonic()
+            if peer.seat is None:
+                peer.seat = self._free_seat()
+                if peer.seat is None:
+                    continue
+                peer.seat.take(address)
+            states = data[INPUT.size:INPUT.size + count]
+            # inputs are sent again until acknowledged, keep new ones
+            for i, state in enumerate(states):
+                if tick + i > peer.tick:
+                    peer.seat.pending.append((tick + i, state))
+                    peer.tick = tick + i
+        now = time.monotonic()
+        for address, peer in list(self.peers.items()):
+            if now - peer.heard > self.timeout:
+                del self.peers[address]
+                if peer.seat is not None:
+                    peer.seat.address = None
+
+    def _free_seat(self):
+        for seat in self.seats:
+            if seat.address is None:
+                return seat
+        return None
+
+    def send_snapshot(self, game):
+        ''' send the game state to every client '''
+        snapshot = Snapshot.capture(game)
+        seq = game.frame
+        for address, peer in self.peers.items():
+            base = peer.sent.get(peer.ack)
+            if base is None:
+                self.snapshots['full'] += 1
+            else:
+                self.snapshots['delta'] += 1
+            seat = peer.seat
+            if seat is None:
+                data = snapshot.encode(seq, 0, base, peer.ack)
+            else:
+                data = snapshot.encode(seq, seat.input_ack, base, peer.ack,
+                                       seat.index)
+            self.send(data, address)
+            peer.sent[seq] = snapshot
+            # older snapshots can't be acknowledged anymore
+            for old in [old for old in peer.sent
+                        if old < peer.ack or old <= seq - self.history]:
+                del peer.sent[old]
+
+
+class NetClient(Endpoint):
+    ''' Remote side, sends input states and rebuilds snapshots
+
+    Input states not acknowledged yet are sent again with each new one,
+    up to redundancy of them, so a lost packet costs no input. loss is
+    the share of the received packets dropped on purpose, to try the
+    game on a bad network.
+    '''
+    def __init__(self, address, history=64, redundancy=8, loss=0.0,
+                 seed=None):
+        Endpoint.__init__(self, remote=address)
+        self.history = history
+        self.redundancy = redundancy
+        self.loss = loss
+        self.random = random.Random(seed)
+        # snapshots received by sequence, bases of the next ones
+        self.received = {}
+        self.seq = 0
+        self.input_ack = 0
+        # ship the server seated the client at, NO_SHIP while it watches
+        self.ship = NO_SHIP
+        # (tick, state) not acknowledged yet
+        self.inputs = collections.deque()
+        self.sent_at = {}
+        # seconds from sending an input to receiving its result
+        self.latencies = []
+        self.snapshots = 0
+        self.dropped = 0
+        self.last_received = time.monotonic()
+
+    def send_input(self, tick, state):
+        self.inputs.append((tick, state))
+        while len(self.inputs) > self.redundancy:
+            self.inputs.popleft()
+        first = self.inputs[0][0]
+        self.sent_at[tick] = time.perf_counter()
+        self.send(INPUT.pack(INPUTS, self.seq, first, len(self.inputs)) +
+                  bytes(state for _, state in self.inputs))
+
+    def poll(self):
+        ''' rebuild the snapshots received, return the latest or None '''
+        latest = None
+        while self.inbox:
+            data, _ = self.inbox.popleft()
+            if self.loss and self.random.random() < self.loss:
+                self.dropped += 1
+                continue
+            try:
+                seq, base_seq, input_ack, ship = Snapshot.header(data)
+                if seq <= self.seq:
+                    continue
+                base = None
+                if base_seq:
+                    base = self.received.get(base_seq)
+                    if base is None:
+                        continue
+                snapshot = Snapshot.decode(data, base)
+            except ValueError:
+                continue
+            self.snapshots += 1
+            self.last_received = time.monotonic()
+            self.ship = ship
+            self.received[seq] = snapshot
+            self.seq = seq
+            for old in [old for old in self.received
+                        if old < base_seq or old <= seq - self.history]:
+                del self.received[old]
+            self._acknowledge(input_ack)
+            latest = snapshot
+        return latest
+
+    def _acknowledge(self, input_ack):
+        if input_ack <= self.input_ack:
+            return
+        now = time.perf_counter()
+        sent = self.sent_at.get(input_ack)
+        if sent is not None:
+            self.latencies.append(now - sent)
+        for tick in [tick for tick in self.sent_at if tick <= input_ack]:
+            del self.sent_at[tick]
+        while self.inputs and self.inputs[0][0] <= input_ack:
+            self.inputs.popleft()
+        self.input_ack = input_ack
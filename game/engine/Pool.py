@@ -0,0 +1,61 @@
+import pygame as pg
+
+
+class Pool(object):
+    ''' Recycle killed sprites instead of creating new ones
+
+    acquire() hands back a released sprite re-initialized through its
+    reset() method (same arguments as __init__ without the game) or
+    builds a new one when none is free. Pooled sprites go back to their
+    pool when killed.
+    '''
+    def __init__(self, cls, game):
+        self.cls = cls
+        self.game = game
+        self.free = []
+        self.hits = 0
+        self.misses = 0
+        self.live = 0
+        self.high_water = 0
+
+    def acquire(self, *args):
+        if self.free:
+            self.hits += 1
+            sprite = self.free.pop()
+            # a recycled sprite is a new entity to network clients
+            sprite.net_id = None
+            sprite.reset(*args)
+        else:
+            self.misses += 1
+            sprite = self.cls(self.game, *args)
+            sprite.pool = self
+        self.live += 1
+        if self.live > self.high_water:
+            self.high_water = self.live
+        return sprite
+
+    def release(self, sprite):
+        self.live -= 1
+        self.free.append(sprite)
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'live': self.live,
+            'free': len(self.free),
+            'high_water': self.high_water,
+        }
+
+
+class Pooled(object):
+    ''' sprite mixin giving killed sprites back to their pool, if any '''
+    pool = None
+    # entity id in network snapshots, given on the first capture
+    net_id = None
+
+    def kill(self):
+        alive = self.alive()
+        pg.sprite.Sprite.kill(self)
+        if alive and self.pool is not None:
+            self.pool.release(self)
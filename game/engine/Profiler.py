@@ -0,0 +1,119 @@
+import time
+import pygame as pg
+from array import array
+from settings import *
+
+
+class FrameProfiler(object):
+    ''' Per phase frame timings
+
+    The game marks the end of each phase of a frame, the time elapsed
+    since the previous mark is added to that phase. The last `size`
+    frames are kept in fixed size ring buffers (in milliseconds) so a
+    mark costs a perf_counter call and never allocates.
+    Frames longer than `budget` milliseconds are counted and the
+    breakdown of the slowest of them is kept.
+    '''
+    def __init__(self, phases, size, budget):
+        self.phases = phases
+        self.index = {phase: i for i, phase in enumerate(phases)}
+        self.size = size
+        self.budget = budget
+        self.frames = array('d', [0.0]) * size
+        self.samples = [array('d', [0.0]) * size for _ in phases]
+        self.current = [0.0] * len(phases)
+        self.count = 0
+        # ms of the last frame
+        self.last_frame = 0.0
+        self.overruns = 0
+        self.slowest = 0.0
+        self.slowest_phases = [0.0] * len(phases)
+        self.start = self.last = time.perf_counter()
+        # the overlay is only drawn when toggled on
+        self.overlay = False
+
+    def begin(self):
+        self.start = self.last = time.perf_counter()
+        for i in range(len(self.current)):
+            self.current[i] = 0.0
+
+    def mark(self, phase):
+        ''' close phase: the time since the last mark is accounted to it '''
+        now = time.perf_counter()
+        self.current[self.index[phase]] += now - self.last
+        self.last = now
+
+    def end(self):
+        slot = self.count % self.size
+        total = (self.last - self.start) * 1000
+        self.frames[slot] = total
+        self.last_frame = total
+        for i, elapsed in enumerate(self.current):
+            self.samples[i][slot] = elapsed * 1000
+        self.count += 1
+        if total > self.budget:
+            self.overruns += 1
+            if total > self.slowest:
+                self.slowest = total
+                self.slowest_phases = [self.samples[i][slot]
+                                       for i in range(len(self.phases))]
+
+    def recent(self, samples):
+        ''' samples of the frames still in the ring, oldest first '''
+        if self.count < self.size:
+            return samples[:self.count]
+        slot = self.count % self.size
+        return samples[slot:] + samples[:slot]
+
+    def stats(self):
+        ''' mean and max of the frame and of each phase, in ms '''
+        result = {}
+        frames = self.recent(self.frames)
+        if not frames:
+            return result
+        for name, samples in [('frame', frames)] + [
+                (phase, self.recent(self.samples[i]))
+                for i, phase in enumerate(self.phases)]:
+            result[name] = (sum(samples) / len(samples), max(samples))
+        return result
+
+    def report(self):
+        lines = ["{:<12}{:>9}{:>9}".format('phase', 'mean', 'max')]
+        for name, (mean, peak) in self.stats().items():
+            lines.append("{:<12}{:>9.3f}{:>9.3f}".format(name, mean, peak))
+        lines.append("{} frames over {:.1f} ms, slowest {:.3f} ms: {}".format(
+            self.overruns, self.budget, self.slowest,
+            ', '.join('{} {:.3f}'.format(phase, elapsed) for phase, elapsed
+                      in zip(self.phases, self.slowest_phases))))
+        return '\n'.join(lines)
+
+    def toggle_overlay(self):
+        self.overlay = not self.overlay
+
+    def draw_overlay(self, surface, text, x, y):
+        ''' frame time graph and phase breakdown, text is a TextRenderer,
+        return the area drawn on '''
+        frames = self.recent(self.frames)
+        # one pixel wide bar per frame, two pixels per millisecond
+        height = int(self.budget * 4)
+        graph = pg.Rect(x, y, self.size, height)
+        surface.fill(BLACK, graph)
+        for i, elapsed in enumerate(frames):
+            bar = min(height, int(elapsed * 2))
+            color = RED if elapsed > self.budget else GREEN
+            surface.fill(color, (x + i, graph.bottom - bar, 1, bar))
+        budget_y = graph.bottom - int(self.budget * 2)
+        pg.draw.line(surface, YELLOW,
+                     (x, budget_y), (graph.right, budget_y))
+
+        area = graph.copy()
+        top = graph.bottom + 4
+        lines = ["{} {:.2f} / {:.2f}".format(name, mean, peak)
+                 for name, (mean, peak) in self.stats().items()]
+        lines.append("overruns {}".format(self.overruns))
+        for line in lines:
+            rect = text.draw(surface, line, 16, (x, top), WHITE,
+                             glyphs=True, anchor='topleft')
+            area.union_ip(rect)
+            top = rect.bottom
+        return area
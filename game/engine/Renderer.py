@@ -0,0 +1,251 @@
+''' Renderers presenting the frames drawn by the game
+
+FullRenderer clears the whole screen surface and flips it every frame.
+DirtyRenderer only erases and presents the areas drawn on during the
+previous and the current frame, which pays off when most of the
+screen is black space that doesn't change.
+TextureRenderer leaves the screen surface to the static screens and
+draws the frames with the textures of an SDL renderer.
+'''
+import pygame as pg
+try:
+    from pygame._sdl2 import sdl2, video
+except ImportError:
+    # the SDL2 video API isn't part of every pygame build
+    video = None
+
+
+class SurfaceRenderer(object):
+    ''' frames drawn on the screen surface '''
+    # sprites are drawn from their rotated images
+    rotates = False
+
+    def __init__(self, screen):
+        self.screen = screen
+
+    def draw_stars(self, starfield):
+        self.add(starfield.draw(self.screen, self.dirty))
+
+    def draw_hud(self, hud):
+        self.add(hud.draw(self.screen))
+
+    def paint(self, draw):
+        ''' draw(surface) paints on the frame and returns the area '''
+        self.add(draw(self.screen))
+
+    def show(self):
+        ''' present the screen surface as it is '''
+        pg.display.flip()
+
+    def expose(self):
+        ''' present the last frame again '''
+        pg.display.flip()
+
+
+class FullRenderer(SurfaceRenderer):
+    # the starfield doesn't need to track its stars
+    dirty = False
+
+    def reset(self):
+        pass
+
+    def clear(self):
+        self.screen.fill((0, 0, 0))
+
+    def add(self, rects):
+        pass
+
+    def draw_group(self, group):
+        group.draw(self.screen)
+
+    def blits(self, sequence):
+        ''' draw a sequence of (surface, position) '''
+        self.screen.blits(sequence, doreturn=False)
+
+    def present(self):
+        pg.display.flip()
+
+
+class DirtyRenderer(SurfaceRenderer):
+    dirty = True
+
+    def __init__(self, screen, max_rects):
+        SurfaceRenderer.__init__(self, screen)
+        # past that many rects the whole screen is presented at once
+        self.max_rects = max_rects
+        self.previous = []
+        self.drawn = []
+        self.full = True
+
+    def reset(self):
+        ''' clear and present the whole screen on the next frame '''
+        self.full = True
+
+    def clear(self):
+        if self.full:
+            self.screen.fill((0, 0, 0))
+        else:
+            for rect in self.drawn:
+                self.screen.fill((0, 0, 0), rect)
+        self.previous = self.drawn
+        self.drawn = []
+
+    def add(self, rects):
+        ''' add a rect or a list of rects drawn on during this frame '''
+        if isinstance(rects, list):
+            self.drawn.extend(rects)
+        else:
+            self.drawn.append(rects)
+
+    def draw_group(self, group):
+        self.blits([(sprite.image, sprite.rect) for sprite in group])
+
+    def blits(self, sequence):
+        self.drawn.extend(self.screen.blits(sequence))
+
+    def present(self):
+        rects = self.previous + self.drawn
+        if self.full or len(rects) > self.max_rects:
+            pg.display.flip()
+        else:
+            pg.display.update(rects)
+        self.full = False
+
+
+class TextureRenderer(object):
+    ''' Frames drawn with the textures of an SDL renderer
+
+    Images are uploaded as textures the first time they are drawn. When
+    rotates is set, which it is for accelerated renderers only as SDL's
+    software renderer rotates slower than blitting a rotation, drawing
+    sequences may give the (image, angle) a surface was rotated from
+    and the texture of that image is drawn rotated instead. Frames are
+    drawn on a target texture the size of the screen which is scaled to
+    a window scale times larger when presented. The screen surface is
+    only uploaded as a whole by show(), for the screens which stand
+    still. Without an accelerated renderer, or when accelerated is
+    False, SDL draws in software.
+    '''
+    available = video is not None
+    dirty = False
+
+    def __init__(self, screen, title, scale=1, accelerated=True):
+        self.screen = screen
+        width, height = screen.get_size()
+        self.window = video.Window(title, (int(width * scale),
+                                           int(height * scale)))
+        self.renderer = None
+        if accelerated:
+            try:
+                self.renderer = video.Renderer(self.window, accelerated=1,
+                                               target_texture=True)
+            except sdl2.error:
+                pass
+        self.accelerated = self.rotates = self.renderer is not None
+        if self.renderer is None:
+            self.renderer = video.Renderer(self.window, accelerated=0,
+                                           target_texture=True)
+        self.frame = video.Texture(self.renderer, (width, height),
+                                   target=True)
+        self.static = video.Texture(self.renderer, (width, height),
+                                    streaming=True)
+        # the starfield is drawn by numpy on a surface uploaded at once,
+        # in the ARGB format of textures so that it is a plain copy
+        self.sky = pg.Surface((width, height), pg.SRCALPHA, 32)
+        self.stars = video.Texture(self.renderer, (width, height),
+                                   streaming=True)
+        # painted areas are uploaded to a blended texture
+        self.layer = pg.Surface((width, height), pg.SRCALPHA)
+        self.overlay = video.Texture(self.renderer, (width, height),
+                                     streaming=True)
+        self.overlay.blend_mode = pg.BLENDMODE_BLEND
+        # texture of every image drawn
+        self.textures = {}
+        # (paints, texture) of the HUD widgets
+        self.widgets = {}
+        self.shown = None
+
+    def texture(self, image):
+        texture = self.textures.get(image)
+        if texture is None:
+            texture = video.Texture.from_surface(self.renderer, image)
+            self.textures[image] = texture
+        return texture
+
+    def reset(self):
+        pass
+
+    def clear(self):
+        # the opaque sky of draw_stars covers the whole frame
+        self.renderer.target = self.frame
+
+    def add(self, rects):
+        pass
+
+    def draw_stars(self, starfield):
+        self.sky.fill((0, 0, 0, 255))
+        starfield.draw(self.sky)
+        self.stars.update(self.sky)
+        self.stars.draw()
+
+    def draw_group(self, group):
+        if self.rotates:
+            self.blits([(sprite.image, sprite.rect,
+                         getattr(sprite, 'rotation', None))
+                        for sprite in group])
+        else:
+            self.blits([(sprite.image, sprite.rect) for sprite in group])
+
+    def blits(self, sequence):
+        ''' draw a sequence of (surface, position), or when rotates is
+        set of (surface, position, rotation) where rotation is None or
+        the (image, angle) surface was rotated from '''
+        for item in sequence:
+            image = item[0]
+            # like blits, only the top left corner of rects counts
+            position = item[1][:2]
+            rotation = item[2] if len(item) > 2 else None
+            if rotation is None:
+                self.texture(image).draw(None, position)
+            else:
+                # rotated around the center of the rotated image
+                original, angle = rotation
+                center = pg.Rect(position, image.get_size()).center
+                self.texture(original).draw(
+                    None, original.get_rect(center=center), -angle)
+
+    def draw_hud(self, hud):
+        hud.refresh()
+        for widget in hud.widgets:
+            paints, texture = self.widgets.get(widget, (None, None))
+            if paints != widget.paints:
+                texture = video.Texture.from_surface(self.renderer,
+                                                     widget.surface)
+                self.widgets[widget] = (widget.paints, texture)
+            texture.draw(None, widget.rect)
+
+    def paint(self, draw):
+        ''' draw(surface) paints on the frame and returns the area '''
+        self.layer.fill((0, 0, 0, 0))
+        area = draw(self.layer).clip(self.layer.get_rect())
+        self.overlay.update(self.layer.subsurface(area), area)
+        self.overlay.draw(area, area)
+
+    def present(self):
+        self._present(self.frame)
+
+    def show(self):
+        ''' present the screen surface as it is '''
+        self.static.update(self.screen)
+        self._present(self.static)
+
+    def expose(self):
+        ''' present the last frame again '''
+        if self.shown is not None:
+            self._present(self.shown)
+
+    def _present(self, texture):
+        self.renderer.target = None
+        texture.draw()
+        self.renderer.present()
+        self.shown = texture
@@ -0,0 +1,83 @@
+import struct
+
+# magic, version, seed, frames per second
+HEADER = struct.Struct('<4sBQH')
+MAGIC = b'PSXR'
+
+
+class Replay(object):
+    ''' Seed and input states of one game
+
+    A game only depends on the seed of random and on the input state of
+    each frame, so that's all a replay keeps. States are run length
+    encoded, a run is stored as the state byte followed by its length
+    as a varint: holding a key for a second costs 2 bytes.
+    '''
+    VERSION = 1
+
+    def __init__(self, seed, fps, runs=None):
+        self.seed = seed
+        self.fps = fps
+        # [state, frames] pairs
+        self.runs = runs if runs is not None else []
+        self.frames = sum(count for _, count in self.runs)
+
+    def __len__(self):
+        return self.frames
+
+    def append(self, state):
+        if self.runs and self.runs[-1][0] == state:
+            self.runs[-1][1] += 1
+        else:
+            self.runs.append([state, 1])
+        self.frames += 1
+
+    def states(self):
+        ''' input state of each frame '''
+        for state, count in self.runs:
+            for _ in range(count):
+                yield state
+
+    def encode(self):
+        data = bytearray(HEADER.pack(MAGIC, Replay.VERSION, self.seed,
+                                     self.fps))
+        for state, count in self.runs:
+            data.append(state)
+            while count > 0x7f:
+                data.append(count & 0x7f | 0x80)
+                count >>= 7
+            data.append(count)
+        return bytes(data)
+
+    @classmethod
+    def decode(cls, data):
+        if len(data) < HEADER.size:
+            raise ValueError('truncated replay')
+        magic, version, seed, fps = HEADER.unpack_from(data)
+        if magic != MAGIC or version != Replay.VERSION:
+            raise ValueError('not a version {} replay'.format(Replay.VERSION))
+        runs = []
+        position = HEADER.size
+        while position < len(data):
+            state = data[position]
+            count = shift = 0
+            while True:
+                position += 1
+                if position >= len(data):
+                    raise ValueError('truncated replay')
+                count |= (data[position] & 0x7f) << shift
+                shift += 7
+                if not data[position] & 0x80:
+                    break
+            position += 1
+            runs.append([state, count])
+        return cls(seed, fps, runs)
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.encode())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls.decode(f.read())
@@ -0,0 +1,69 @@
+import pygame as pg
+from collections import OrderedDict
+
+
+class RotationCache(object):
+    ''' Shared cache of pre-rotated surfaces
+
+    Rotations are quantized to a fixed number of steps so every mob
+    using the same meteor image shares the same rotated surfaces.
+    Entries are built lazily and the least recently used ones are
+    evicted once the cache holds more than max_size surfaces. The
+    collision masks of the rotated surfaces are cached the same way.
+    prepare, when given, returns a rotated surface in its blit format.
+    '''
+    def __init__(self, steps, max_size, prepare=None):
+        self.steps = steps
+        self.max_size = max_size
+        self.prepare = prepare
+        self.surfaces = OrderedDict()
+        self.masks = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def step(self, angle):
+        ''' quantize an angle in degrees to a step index '''
+        return int(round(angle * self.steps / 360.0)) % self.steps
+
+    def angle(self, angle):
+        ''' angle in degrees of the step of an angle '''
+        return self.step(angle) * 360.0 / self.steps
+
+    def get(self, image, angle):
+        key = (image, self.step(angle))
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = pg.transform.rotate(image, key[1] * 360.0 / self.steps)
+        if self.prepare is not None:
+            surface = self.prepare(surface)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def mask(self, image, angle):
+        ''' collision mask of the rotated image '''
+        key = (image, self.step(angle))
+        mask = self.masks.get(key)
+        if mask is not None:
+            self.masks.move_to_end(key)
+            return mask
+
+        mask = pg.mask.from_surface(self.get(image, angle))
+        self.masks[key] = mask
+        if len(self.masks) > self.max_size:
+            self.masks.popitem(last=False)
+        return mask
+
+    def warm(self, images, masks=False):
+        ''' pre-render every step of the given images, and their masks '''
+        for image in images:
+            for step in range(self.steps):
+                self.get(image, step * 360.0 / self.steps)
+                if masks:
+                    self.mask(image, step * 360.0 / self.steps)
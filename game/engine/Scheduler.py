@@ -0,0 +1,53 @@
+import pygame as pg
+
+HIDING = (pg.WINDOWMINIMIZED, pg.WINDOWHIDDEN)
+SHOWING = (pg.WINDOWRESTORED, pg.WINDOWMAXIMIZED, pg.WINDOWSHOWN)
+
+
+class FrameScheduler(object):
+    ''' Decides how hard the game loop runs from the window state
+
+    A focused window plays and draws at full rate. Out of focus the
+    game is paused, or when it can't pause (a network client) it keeps
+    playing but only draws idle_fps frames a second, and nothing at all
+    is drawn while the window is minimized. Screens which don't move
+    block in wait until an event comes instead of polling.
+    '''
+    def __init__(self, idle_fps, pause=True):
+        self.idle_fps = idle_fps
+        self.pause = pause
+        self.focused = True
+        self.visible = True
+
+    def handle(self, events):
+        ''' follow the window state from the events of a frame '''
+        for event in events:
+            if event.type == pg.WINDOWFOCUSLOST:
+                self.focused = False
+            elif event.type == pg.WINDOWFOCUSGAINED:
+                self.focused = True
+            elif event.type in HIDING:
+                self.visible = False
+            elif event.type in SHOWING:
+                self.visible = True
+
+    @property
+    def idle(self):
+        return not (self.focused and self.visible)
+
+    @property
+    def paused(self):
+        return self.pause and self.idle
+
+    def fps(self, render_fps):
+        ''' frames to draw per second '''
+        return self.idle_fps if self.idle else render_fps
+
+    def wait(self, timeout):
+        ''' block until events come or timeout ms elapsed, return them '''
+        event = pg.event.wait(int(timeout))
+        if event.type == pg.NOEVENT:
+            return []
+        events = [event] + pg.event.get()
+        self.handle(events)
+        return events
@@ -0,0 +1,190 @@
+import itertools
+import struct
+
+# packet type, sequence, base sequence (0 for none), last input applied
+# and ship of the client the packet is sent to
+HEADER = struct.Struct('<BIIIB')
+SNAPSHOT = 1
+# ship of a client watching the game
+NO_SHIP = 0xff
+# score and number of ships
+GAME = struct.Struct('<IB')
+# x in 1/16 pixel, velocity in 1/256 pixel per step, shield, lives,
+# flags
+PLAYER = struct.Struct('<hhhBB')
+HIDDEN = 1
+# the ship has no player, it is out of the game
+ABSENT = 2
+COUNT = struct.Struct('<H')
+# entity id and mask of the fields which follow
+ENTITY = struct.Struct('<HB')
+# kind, x, y and aux, a small move replaces x and y
+FIELDS = (struct.Struct('<B'), struct.Struct('<h'), struct.Struct('<h'),
+          struct.Struct('<H'))
+FULL = (1 << len(FIELDS)) - 1
+POSITION = 6
+MOVED = 1 << len(FIELDS)
+MOVE = struct.Struct('<bb')
+
+# entity kinds, aux is the meteor image and rotation step of a mob and
+# the type of a power-up
+MOB, BULLET, POWERUP = range(3)
+POWERUPS = ('shield', 'bolt_silver', 'bolt_gold')
+
+
+class Snapshot(object):
+    ''' Quantized state of a game at one step
+
+    The score and the fields of each ship are integers, every mob,
+    bullet and power-up is a (kind, x, y, aux) tuple of integers keyed by
+    a 16 bits entity id, never 0, which a sprite keeps for as long as it
+    lives and which once wrapped around skips the ids still in use. A
+    snapshot is encoded against a base snapshot the other end already
+    has: the ships are sent whole but only the entities added, removed
+    or changed are and a move of less than 128 pixels costs 2 bytes.
+    '''
+    ids = itertools.count(1)
+
+    def __init__(self, players, score, entities):
+        # (x, velocity, shield, lives, flags) of each ship
+        self.players = players
+        self.score = score
+        self.entities = entities
+
+    @classmethod
+    def capture(cls, game):
+        players = tuple((int(round(player.position.x * 16)),
+                         int(round(player.velocity.x * 256)),
+                         player.shield, player.lives,
+                         (HIDDEN if player.hidden else 0) |
+                         (0 if player.playing else ABSENT))
+                        for player in game.players)
+        meteors = {image: index
+                   for index, image in enumerate(game.meteors_img)}
+        cache = game.rotation_cache
+        groups = ((MOB, game.mobs), (BULLET, game.bullets),
+                  (POWERUP, game.powerups))
+        used = {sprite.net_id for _, group in groups for sprite in group}
+        entities = {}
+        for kind, group in groups:
+            for sprite in group:
+                net_id = sprite.net_id
+                if net_id is None:
+                    net_id = sprite.net_id = cls._new_id(used)
+                if kind == MOB:
+                    aux = meteors[sprite.image_original] * cache.steps + \
+                        cache.step(sprite.rot)
+                elif kind == POWERUP:
+                    aux = POWERUPS.index(sprite.type)
+                else:
+                    aux = 0
+                x, y = sprite.rect.center
+                entities[net_id] = (kind, x, y, aux)
+        return cls(players, game.score, entities)
+
+    @classmethod
+    def _new_id(cls, used):
+        ''' next 16 bits id but 0 and the ids in used, added to used '''
+        net_id = next(cls.ids) & 0xffff
+        while net_id == 0 or net_id in used:
+            net_id = next(cls.ids) & 0xffff
+        used.add(net_id)
+        return net_id
+
+    def encode(self, seq, input_ack, base=None, base_seq=0, ship=NO_SHIP):
+        ''' packet of this snapshot, numbered seq, as a delta from base
+        numbered base_seq, or whole when there is no base, for the client
+        playing ship '''
+        if base is None:
+            base_seq = 0
+            previous = {}
+        else:
+            previous = base.entities
+        data = bytearray(HEADER.pack(SNAPSHOT, seq, base_seq, input_ack,
+                                     ship))
+        data += GAME.pack(self.score, len(self.players))
+        for player in self.players:
+            data += PLAYER.pack(*player)
+
+        removed = [net_id for net_id in previous
+                   if net_id not in self.entities]
+        data += COUNT.pack(len(removed))
+        for net_id in removed:
+            data += COUNT.pack(net_id)
+
+        changed = bytearray()
+        count = 0
+        for net_id, entity in self.entities.items():
+            old = previous.get(net_id)
+            if old == entity:
+                continue
+            count += 1
+            mask = FULL
+            if old is not None:
+                mask = 0
+                for i in range(len(FIELDS)):
+                    if entity[i] != old[i]:
+                        mask |= 1 << i
+                dx = entity[1] - old[1]
+                dy = entity[2] - old[2]
+                if mask & POSITION and -128 <= dx < 128 and -128 <= dy < 128:
+                    mask = mask & ~POSITION | MOVED
+            changed += ENTITY.pack(net_id, mask)
+            for i, field in enumerate(FIELDS):
+                if mask & 1 << i:
+                    changed += field.pack(entity[i])
+            if mask & MOVED:
+                changed += MOVE.pack(dx, dy)
+        data += COUNT.pack(count)
+        data += changed
+        return bytes(data)
+
+    @staticmethod
+    def header(data):
+        ''' (seq, base_seq, input_ack, ship) of a packet '''
+        if len(data) < HEADER.size:
+            raise ValueError('truncated snapshot')
+        kind, seq, base_seq, input_ack, ship = HEADER.unpack_from(data)
+        if kind != SNAPSHOT:
+            raise ValueError('not a snapshot')
+        return seq, base_seq, input_ack, ship
+
+    @classmethod
+    def decode(cls, data, base=None):
+        ''' snapshot of a packet encoded against base '''
+        try:
+            position = HEADER.size
+            score, ships = GAME.unpack_from(data, position)
+            position += GAME.size
+            players = []
+            for _ in range(ships):
+                players.append(PLAYER.unpack_from(data, position))
+                position += PLAYER.size
+            entities = dict(base.entities) if base is not None else {}
+
+            removed, = COUNT.unpack_from(data, position)
+            position += COUNT.size
+            for _ in range(removed):
+                net_id, = COUNT.unpack_from(data, position)
+                position += COUNT.size
+                entities.pop(net_id, None)
+
+            count, = COUNT.unpack_from(data, position)
+            position += COUNT.size
+            for _ in range(count):
+                net_id, mask = ENTITY.unpack_from(data, position)
+                position += ENTITY.size
+                entity = list(entities.get(net_id, (0, 0, 0, 0)))
+                for i, field in enumerate(FIELDS):
+                    if mask & 1 << i:
+                        entity[i], = field.unpack_from(data, position)
+                        position += field.size
+                if mask & MOVED:
+                    dx, dy = MOVE.unpack_from(data, position)
+                    position += MOVE.size
+                    entity[1] += dx
+                    entity[2] += dy
+                entities[net_id] = tuple(entity)
+        except struct.error:
+            raise ValueError('truncated snapshot')
+        return cls(tuple(players), score, entities)
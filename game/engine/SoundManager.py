@@ -0,0 +1,123 @@
+import io
+import time
+import pygame as pg
+
+
+class SoundManager(object):
+    ''' Mixer voice manager
+
+    Sounds are requested by name. Each category of sounds plays on its
+    own reserved channels and each sound on at most `voices` of them at
+    a time. A sound requested again less than `window` ms after it
+    started is not played again, the voice already playing it gets
+    louder instead. When a category has no free channel left the oldest
+    voice is stolen, unless it only just started in which case the new
+    request is dropped. Voices are timed in real time, like the mixer
+    playing them, whatever the pace of the game clock: ticks() gives
+    that time in ms, the SDL timer isn't started by the game.
+    The mixer is only started when audio is first needed, sounds are
+    given as the content of their files and decoded at that time.
+    '''
+    def __init__(self, sounds, categories, config, volume, window,
+                 ticks=None):
+        # sound files content by name, categories: number of channels by
+        # category, config: (category, voices) by sound name
+        self.data = sounds
+        self.categories = categories
+        self.config = config
+        self.volume = volume
+        self.window = window
+        self.ticks = ticks or (lambda: time.perf_counter() * 1000)
+        self.stats = {name: {'played': 0, 'coalesced': 0,
+                             'stolen': 0, 'dropped': 0}
+                      for name in config}
+        self.started = False
+        self.sounds = {}
+        self.channels = {}
+        # (sound name, start time, requests merged) by channel
+        self.voices = {}
+
+    def start(self):
+        ''' start the mixer if needed, return whether audio is available '''
+        if self.started:
+            return bool(self.channels)
+        self.started = True
+        try:
+            pg.mixer.init()
+        except pg.error:
+            return False
+        total = sum(self.categories.values())
+        pg.mixer.set_num_channels(max(total, pg.mixer.get_num_channels()))
+        pg.mixer.set_reserved(total)
+        first = 0
+        for category, count in sorted(self.categories.items()):
+            self.channels[category] = [pg.mixer.Channel(i) for i in
+                                       range(first, first + count)]
+            first += count
+        # decode the sounds already loaded
+        for name in list(self.data.keys()):
+            self.sound(name)
+        return True
+
+    def sound(self, name):
+        ''' decoded sound, needs the mixer, None while it is loading '''
+        sound = self.sounds.get(name)
+        if sound is None:
+            data = self.data[name]
+            if data is None:
+                return None
+            sound = pg.mixer.Sound(io.BytesIO(data))
+            self.sounds[name] = sound
+        return sound
+
+    def play(self, name):
+        category, voices = self.config[name]
+        stats = self.stats[name]
+        self.start()
+        channels = self.channels.get(category)
+        if not channels or self.sound(name) is None:
+            stats['dropped'] += 1
+            return
+        now = self.ticks()
+
+        playing = [channel for channel in channels
+                   if channel.get_busy() and channel in self.voices]
+        same = [channel for channel in playing
+                if self.voices[channel][0] == name]
+
+        # merge with the latest voice of this sound if it just started
+        if same:
+            latest = max(same, key=lambda channel: self.voices[channel][1])
+            _, start, merged = self.voices[latest]
+            if now - start < self.window:
+                merged += 1
+                self.voices[latest] = (name, start, merged)
+                latest.set_volume(self._volume(merged))
+                stats['coalesced'] += 1
+                return
+
+        if len(same) >= voices:
+            # too many voices of this sound, restart its oldest one
+            channel = min(same, key=lambda channel: self.voices[channel][1])
+            stats['stolen'] += 1
+        else:
+            free = [channel for channel in channels
+                    if channel not in playing]
+            if free:
+                channel = free[0]
+            else:
+                channel = min(playing,
+                              key=lambda channel: self.voices[channel][1])
+                if now - self.voices[channel][1] < self.window:
+                    stats['dropped'] += 1
+                    return
+                stats['stolen'] += 1
+
+        channel.set_volume(self._volume(1))
+        channel.play(self.sound(name))
+        self.voices[channel] = (name, now, 1)
+        stats['played'] += 1
+
+    def _volume(self, merged):
+        # each merged request makes the voice a quarter louder
+        return min(1.0, self.volume * (1 + 0.25 * (merged - 1)))
@@ -0,0 +1,85 @@
+from collections import defaultdict
+
+
+def collide_mask(left, right):
+    ''' pixel perfect collision of two sprites with a mask, only tested
+    once the circles enclosing their rects overlap '''
+    a = left.rect
+    b = right.rect
+    dx = a.centerx - b.centerx
+    dy = a.centery - b.centery
+    # twice the radii, so the distance is doubled too
+    reach = (a.width ** 2 + a.height ** 2) ** 0.5 + \
+        (b.width ** 2 + b.height ** 2) ** 0.5
+    if 4 * (dx * dx + dy * dy) > reach * reach:
+        return False
+    return left.mask.overlap(right.mask, (b.x - a.x, b.y - a.y)) is not None
+
+
+class SpatialHash(object):
+    ''' Uniform grid broadphase for sprite collisions
+
+    Sprites of a group are bucketed by the grid cells they cover, so a
+    collision query only runs the exact rect or circle test against the
+    sprites sharing a cell with the tested sprite instead of the whole
+    group. The grid is rebuilt from its group before each pass.
+    '''
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = defaultdict(list)
+        self.order = {}
+        self.group = None
+
+    def rebuild(self, group):
+        self.cells.clear()
+        self.order.clear()
+        self.group = group
+        for index, sprite in enumerate(group.sprites()):
+            self.order[sprite] = index
+            for cell in self._cells(SpatialHash.bounds(sprite)):
+                self.cells[cell].append(sprite)
+
+    def query(self, rect):
+        ''' return sprites sharing a cell with rect in group order '''
+        candidates = set()
+        for cell in self._cells(rect):
+            bucket = self.cells.get(cell)
+            if bucket:
+                candidates.update(bucket)
+        return sorted(candidates, key=self.order.__getitem__)
+
+    def spritecollide(self, sprite, dokill, collided=None):
+        ''' same as pg.sprite.spritecollide against the grid's group '''
+        crashed = []
+        for candidate in self.query(SpatialHash.bounds(sprite)):
+            # skip the sprites killed since the grid was built
+            if candidate not in self.group:
+                continue
+            if collided is not None:
+                collide = collided(sprite, candidate)
+            else:
+                collide = sprite.rect.colliderect(candidate.rect)
+            if collide:
+                if dokill:
+                    candidate.kill()
+                crashed.append(candidate)
+        return crashed
+
+    def _cells(self, rect):
+        size = self.cell_size
+        for x in range(rect.left // size, (rect.right - 1) // size + 1):
+            for y in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                yield x, y
+
+    @staticmethod
+    def bounds(sprite):
+        ''' area a sprite can collide in: its rect, grown to enclose
+        its collision circle when it has a radius '''
+        rect = sprite.rect
+        radius = getattr(sprite, 'radius', None)
+        if radius is None:
+            return rect
+        circle = rect.copy()
+        circle.size = (radius * 2, radius * 2)
+        circle.center = rect.center
+        return rect.union(circle)
@@ -0,0 +1,42 @@
+import pygame as pg
+
+# no transparency, colorkey, run length encoded colorkey, per pixel alpha
+OPAQUE = 'opaque'
+COLORKEY = 'colorkey'
+RLE = 'rle'
+ALPHA = 'alpha'
+FORMATS = (OPAQUE, COLORKEY, RLE, ALPHA)
+
+
+class SurfaceFormats(object):
+    ''' Blit format of each class of assets
+
+    Every asset is prepared once when loaded, its class is its name up
+    to the first '/'. The colorkey is transparent in the colorkeyed
+    formats, RLE surfaces are run length encoded by SDL when first
+    blitted so that their transparent runs are skipped at once. The
+    blit_* microbenchmarks compare the formats on each class.
+    '''
+    def __init__(self, formats, colorkey):
+        self.formats = formats
+        self.colorkey = colorkey
+
+    def prepare(self, name, surface):
+        ''' surface in the format of its class '''
+        return self.convert(surface, self.formats[name.split('/')[0]])
+
+    def convert(self, surface, format):
+        ''' surface in format, changed in place but for ALPHA which
+        returns a new surface '''
+        if format == OPAQUE:
+            surface.set_colorkey(None)
+        elif format == COLORKEY:
+            surface.set_colorkey(self.colorkey)
+        elif format == RLE:
+            surface.set_colorkey(self.colorkey, pg.RLEACCEL)
+        elif format == ALPHA:
+            surface.set_colorkey(self.colorkey)
+            return surface.convert_alpha()
+        else:
+            raise ValueError('unknown surface format {}'.format(format))
+        return surface
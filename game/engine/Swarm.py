@@ -0,0 +1,192 @@
+import random
+import numpy as np
+
+from settings import *
+
+# bullets move up that many pixels a frame, same as Bullet
+BULLET_SPEED = -10
+# mobs turn every ROTATE_DELAY ms, same as Mob
+ROTATE_DELAY = 50
+
+
+class Swarm(object):
+    ''' Struct of arrays engine for swarm waves of meteors
+
+    Positions, speeds, rotations and radii of the mobs and of the
+    bullets are kept in numpy arrays instead of one sprite each:
+    movement, screen edges respawn and collisions are computed for the
+    whole wave at once and everything is drawn with a single blits call.
+    Mobs behave like Mob sprites except a hit mob is respawned in place,
+    so the wave keeps its size.
+    '''
+    def __init__(self, game, mobs):
+        self.game = game
+        self.rng = np.random.default_rng(random.getrandbits(32))
+        # every rotation of every meteor, indexed by kind * steps + step,
+        # with their masks and the half sizes of these surfaces
+        cache = game.rotation_cache
+        self.steps = cache.steps
+        self.frames = []
+        self.masks = []
+        # (image, angle) the frames were rotated from
+        self.rotations = []
+        for image in game.meteors_img:
+            for step in range(self.steps):
+                angle = step * 360.0 / self.steps
+                self.frames.append(cache.get(image, angle))
+                self.masks.append(cache.mask(image, angle))
+                self.rotations.append((image, angle))
+        self.half = np.array([frame.get_size() for frame in self.frames],
+                             dtype=float) / 2
+        # radius of the circles enclosing the frames
+        self.bound = np.hypot(self.half[:, 0], self.half[:, 1])
+        self.kind_radius = np.array([int(image.get_width() * 0.85 / 2)
+                                     for image in game.meteors_img])
+
+        # mobs, the center of their rotated image is at x, y
+        self.kind = np.zeros(mobs, dtype=int)
+        self.radius = np.zeros(mobs, dtype=int)
+        self.x = np.zeros(mobs)
+        self.y = np.zeros(mobs)
+        self.speedx = np.zeros(mobs)
+        self.speedy = np.zeros(mobs)
+        self.rot = np.zeros(mobs)
+        self.rot_speed = np.zeros(mobs)
+        self.step = np.zeros(mobs, dtype=int)
+        self.last_update = np.zeros(mobs, dtype=int)
+        self._spawn(np.arange(mobs))
+
+        # bullets, their bottom middle is at x, y
+        self.laser = game.laser_img
+        self.laser_size = self.laser.get_size()
+        self.bullet_x = np.zeros(0)
+        self.bullet_y = np.zeros(0)
+
+    def __len__(self):
+        return len(self.x)
+
+    @property
+    def bullets(self):
+        ''' number of bullets on screen '''
+        return len(self.bullet_x)
+
+    def fire(self, x, y):
+        self.bullet_x = np.append(self.bullet_x, x)
+        self.bullet_y = np.append(self.bullet_y, y)
+
+    def update(self):
+        now = self.game.animator.now
+        turn = now - self.last_update > ROTATE_DELAY
+        self.last_update[turn] = now
+        self.rot[turn] = (self.rot[turn] + self.rot_speed[turn]) % 360
+        self.step = np.rint(self.rot * self.steps / 360).astype(int)
+        self.step %= self.steps
+
+        self.x += self.speedx
+        self.y += self.speedy
+        half = self._half()
+        out = (self.y + half[:, 1] > HEIGHT) | (self.x + half[:, 0] < 0) | \
+            (self.x - half[:, 0] > WIDTH)
+        if out.any():
+            self._respawn(np.flatnonzero(out), half[out])
+
+        self.bullet_y += BULLET_SPEED
+        if self.bullets:
+            self._keep_bullets(self.bullet_y >= 0)
+
+    def collide_bullets(self):
+        ''' kill the bullets touching a mob and respawn the mobs they hit,
+        return the (radius, center) of these mobs '''
+        if not self.bullets:
+            return []
+        width, height = self.laser_size
+        # distance from each mob center to the segment along each bullet
+        dx = self.x[:, None] - self.bullet_x[None, :]
+        dy = self.y[:, None] - np.clip(self.y[:, None],
+                                       self.bullet_y[None, :] - height,
+                                       self.bullet_y[None, :])
+        reach = self.radius[:, None] + width / 2.0
+        touched = dx * dx + dy * dy < reach * reach
+        self._keep_bullets(~touched.any(axis=0))
+        return self._hit(touched.any(axis=1))
+
+    def collide_player(self, player):
+        ''' respawn the mobs overlapping the player's mask, return their
+        (radius, center) '''
+        rect = player.rect
+        dx = self.x - rect.centerx
+        dy = self.y - rect.centery
+        index = self.kind * self.steps + self.step
+        # pixels are only compared when the enclosing circles overlap
+        reach = self.bound[index] + np.hypot(rect.width, rect.height) / 2
+        hit = dx * dx + dy * dy < reach * reach
+        for i in np.flatnonzero(hit).tolist():
+            left, top = (np.array([self.x[i], self.y[i]]) -
+                         self.half[index[i]]).astype(int).tolist()
+            hit[i] = player.mask.overlap(
+                self.masks[index[i]], (left - rect.x, top - rect.y)
+            ) is not None
+        return self._hit(hit)
+
+    def blits(self, alpha=1.0, rotations=False):
+        ''' (surface, position) of every visible mob and bullet, alpha of
+        the way from their position before the last update, and the
+        rotation of the mobs when asked, see TextureRenderer.blits '''
+        back = 1.0 - alpha
+        x = self.x - self.speedx * back
+        y = self.y - self.speedy * back
+        index = self.kind * self.steps + self.step
+        half = self.half[index]
+        visible = y + half[:, 1] > 0
+        topleft = np.stack([x, y], axis=1)[visible] - half[visible]
+        index = index[visible].tolist()
+        frames = [self.frames[i] for i in index]
+        positions = topleft.astype(int).tolist()
+        if rotations:
+            sequence = list(zip(frames, positions,
+                                [self.rotations[i] for i in index]))
+        else:
+            sequence = list(zip(frames, positions))
+        width, height = self.laser_size
+        bullet_y = self.bullet_y - BULLET_SPEED * back - height
+        sequence.extend((self.laser, position) for position in np.stack(
+            [self.bullet_x - width // 2, bullet_y], axis=1
+        ).astype(int).tolist())
+        return sequence
+
+    def _half(self):
+        return self.half[self.kind * self.steps + self.step]
+
+    def _hit(self, hit):
+        index = np.flatnonzero(hit)
+        hits = [(radius, (int(x), int(y))) for radius, x, y in zip(
+            self.radius[index].tolist(), self.x[index], self.y[index])]
+        if len(index):
+            self._spawn(index)
+        return hits
+
+    def _spawn(self, index):
+        ''' (re)initialize the mobs at index like Mob.reset '''
+        count = len(index)
+        rng = self.rng
+        self.kind[index] = rng.integers(0, len(self.kind_radius), count)
+        self.radius[index] = self.kind_radius[self.kind[index]]
+        self.rot[index] = 0
+        self.step[index] = 0
+        self.rot_speed[index] = rng.integers(-8, 8, count) % 360
+        self.speedx[index] = rng.integers(-3, 3, count)
+        self.last_update[index] = self.game.animator.now
+        self._respawn(index, self._half()[index])
+
+    def _respawn(self, index, half):
+        ''' move the mobs at index back above the screen like Mob.update '''
+        count = len(index)
+        width = half[:, 0] * 2
+        self.x[index] = np.floor(
+            self.rng.random(count) * (WIDTH - width)) + half[:, 0]
+        self.y[index] = self.rng.integers(-100, -40, count) + half[:, 1]
+        self.speedy[index] = self.rng.integers(1, 8, count)
+
+    def _keep_bullets(self, keep):
+        self.bullet_x = self.bullet_x[keep]
+        self.bullet_y = self.bullet_y[keep]
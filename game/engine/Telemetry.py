@@ -0,0 +1,182 @@
+import gzip
+import json
+import os
+import queue
+import threading
+import zlib
+import numpy as np
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# one row a frame
+FIELDS = (
+    ('frame', np.uint32),
+    ('frame_us', np.uint32),
+    ('overrun', np.uint8),
+    ('mobs', np.uint16),
+    ('bullets', np.uint16),
+    ('powerups', np.uint16),
+    ('sprites', np.uint16),
+    ('collisions', np.uint16),
+    ('score', np.uint32),
+    ('shield', np.int16),
+    ('power', np.uint8),
+)
+# rows as saved, little endian
+DTYPE = np.dtype([(name, np.dtype(kind).newbyteorder('<'))
+                  for name, kind in FIELDS])
+# compression level of the column files
+LEVEL = 6
+
+
+class Telemetry(object):
+    ''' Stream of per frame metrics
+
+    record() writes a row in a preallocated ring of capacity rows and,
+    every batch rows, hands the index reached to a writer thread which
+    saves the new rows in columns: each field is appended to its own
+    file of the path directory as a gzip member, compressed by zlib
+    without holding the GIL. load() reads the columns back and export()
+    converts them to gzipped JSON lines. The game never waits on the
+    writer: rows it couldn't save before the ring wrapped around are
+    counted as dropped. When port is given the last row and the
+    counters are served on localhost in the Prometheus text format.
+    '''
+    def __init__(self, path, capacity, batch, port=None):
+        self.rows = np.zeros(capacity, dtype=DTYPE)
+        self.names = self.rows.dtype.names
+        self.capacity = capacity
+        self.batch = batch
+        # rows recorded, saved and lost
+        self.head = 0
+        self.saved = 0
+        self.dropped = 0
+        self.overruns = 0
+        self.queue = queue.SimpleQueue()
+        self.files = None
+        self.writer = None
+        if path:
+            os.makedirs(path, exist_ok=True)
+            self.files = [open(Telemetry._column(path, name), 'ab')
+                          for name in self.names]
+            self.writer = threading.Thread(target=self._write, daemon=True)
+            self.writer.start()
+        self.server = None
+        if port is not None:
+            self.server = ThreadingHTTPServer(('127.0.0.1', port),
+                                              self._handler())
+            self.server.daemon_threads = True
+            threading.Thread(target=self.server.serve_forever,
+                             daemon=True).start()
+
+    def record(self, values):
+        ''' values of the fields in order, called on the game loop '''
+        self.rows[self.head % self.capacity] = values
+        self.head += 1
+        if values[2]:
+            self.overruns += 1
+        if self.head % self.batch == 0 and self.writer is not None:
+            self.queue.put(self.head)
+
+    def _write(self):
+        while True:
+            head = self.queue.get()
+            if head is None:
+                break
+            self._save(head)
+
+    def _save(self, head):
+        start = max(self.saved, head - self.capacity)
+        indexes = np.arange(start, head) % self.capacity
+        rows = self.rows[indexes]
+        # the game may have lapped the first rows, or all of them, while
+        # they were copied
+        start = min(max(start, self.head - self.capacity), head)
+        rows = rows[len(rows) - (head - start):]
+        self.dropped += start - self.saved
+        self.saved = head
+        if not len(rows):
+            return
+        for name, file in zip(self.names, self.files):
+            file.write(zlib.compress(rows[name].tobytes(), LEVEL, wbits=31))
+            # readable even if the game crashes later
+            file.flush()
+
+    @staticmethod
+    def _column(path, name):
+        return os.path.join(path, name + '.gz')
+
+    @staticmethod
+    def load(path):
+        ''' rows saved to the path directory '''
+        columns = {}
+        for name in DTYPE.names:
+            with open(Telemetry._column(path, name), 'rb') as f:
+                data = f.read()
+            chunks = []
+            while data:
+                member = zlib.decompressobj(wbits=31)
+                chunk = member.decompress(data)
+                # the last batch may have been cut short by a crash
+                if not member.eof:
+                    break
+                chunks.append(chunk)
+                data = member.unused_data
+            columns[name] = np.frombuffer(b''.join(chunks), DTYPE[name])
+        rows = np.zeros(min(len(column) for column in columns.values()),
+                        dtype=DTYPE)
+        for name, column in columns.items():
+            rows[name] = column[:len(rows)]
+        return rows
+
+    @staticmethod
+    def export(path, output):
+        ''' convert the rows saved to the path directory to gzipped JSON
+        lines '''
+        rows = Telemetry.load(path)
+        with gzip.open(output, 'wt') as f:
+            for row in rows.tolist():
+                f.write(json.dumps(dict(zip(DTYPE.names, row))) + '\n')
+        return len(rows)
+
+    def metrics(self):
+        ''' last row and counters in the Prometheus text format '''
+        lines = []
+        if self.head:
+            last = self.rows[(self.head - 1) % self.capacity].tolist()
+            for name, value in zip(self.names, last):
+                lines.append('pyspacex_{} {}'.format(name, value))
+        for name, value in (('recorded', self.head), ('saved', self.saved),
+                            ('dropped', self.dropped),
+                            ('overruns', self.overruns)):
+            lines.append('pyspacex_{}_total {}'.format(name, value))
+        return '\n'.join(lines) + '\n'
+
+    def _handler(self):
+        telemetry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = telemetry.metrics().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+        return Handler
+
+    def close(self):
+        ''' save the rows left and stop the threads '''
+        if self.writer is not None:
+            self.queue.put(self.head)
+            self.queue.put(None)
+            self.writer.join()
+            for file in self.files:
+                file.close()
+            self.writer = None
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
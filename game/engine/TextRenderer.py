@@ -0,0 +1,61 @@
+import pygame as pg
+from collections import OrderedDict
+
+
+class TextRenderer(object):
+    ''' Font and rendered text cache
+
+    Fonts are kept per size and rendered surfaces per (text, size, color),
+    the least recently used surfaces being dropped once more than max_size
+    of them are cached. Text changing every frame (score, coordinates...)
+    can be composed from cached glyphs instead of being rendered as a
+    whole string.
+    '''
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+
+    def font(self, size):
+        font = self.fonts.get(size)
+        if font is None:
+            # font = pg.font.Font(FONT_NAME, size)
+            font = self.fonts[size] = pg.font.Font(None, size)
+        return font
+
+    def render(self, text, size, color):
+        key = (text, size, color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+
+        surface = self.font(size).render(text, True, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def draw(self, surface, text, size, pos, color, glyphs=False,
+             anchor='midtop'):
+        ''' draw text with its anchor point (midtop, topleft...) at pos
+        and return the drawn area '''
+        if not glyphs:
+            text_surface = self.render(text, size, color)
+            text_rect = text_surface.get_rect()
+            setattr(text_rect, anchor, pos)
+            return surface.blit(text_surface, text_rect)
+
+        # blit one cached glyph per character, side by side
+        images = [self.render(char, size, color) for char in text]
+        width = sum(image.get_width() for image in images)
+        height = max([image.get_height() for image in images], default=0)
+        text_rect = pg.Rect(0, 0, width, height)
+        setattr(text_rect, anchor, pos)
+        left = text_rect.left
+        sequence = []
+        for image in images:
+            sequence.append((image, (left, text_rect.top)))
+            left += image.get_width()
+        surface.blits(sequence, doreturn=False)
+        return text_rect
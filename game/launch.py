@@ -0,0 +1,8 @@
+''' Launch time of the game
+
+main imports this module before anything else so that the startup
+profile accounts the imports from there.
+'''
+import time
+
+LAUNCHED = time.perf_counter()
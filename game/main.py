@@ -4,185 +4,564 @@
 Inspired by the wonderful KidsCanCode videos on youtube
 https://www.youtube.com/channel/UCNaPQ5uLX5iIEHUCLmfAgKg
 '''
+# first of all, the startup profile accounts imports from there
+from launch import LAUNCHED
+import argparse
 import os
 import sys
+import time
 import glob
 import random
+from collections import OrderedDict
+from functools import partial
 import pygame as pg
-from webcolors import name_to_rgb as rgb
 
 from settings import *
+from engine.AssetCache import AssetCache
+from engine.Animator import Animator
+from engine.Clock import PacedClock, SimClock
+from engine.Hud import Hud
+from engine.Loader import LazyAssets, Loader
+from engine.Input import BotInput, KeyboardInput, FIRE
+from engine.Input import RecordingInput, ReplayInput
+from engine.Pool import Pool
+from engine.Profiler import FrameProfiler
+from engine.Renderer import DirtyRenderer, FullRenderer, TextureRenderer
+from engine.Replay import Replay
+from engine.Scheduler import FrameScheduler
+from engine.Telemetry import Telemetry
+from engine.RotationCache import RotationCache
+from engine.SoundManager import SoundManager
+from engine.SpatialHash import SpatialHash, collide_mask
+from engine.SurfaceFormats import SurfaceFormats
+from engine.Swarm import Swarm
+from engine.TextRenderer import TextRenderer
+from sprites.Bullet import Bullet
 from sprites.Explosion import Explosion
 from sprites.Mob import Mob
 from sprites.Player import Player
 from sprites.PowerUp import PowerUp
 from sprites.Starfield import Starfield
 
+IMPORTED = time.perf_counter()
+
+# closing the window only quits by itself when it is the only one, the
+# texture backend has another one hidden
+QUIT = (pg.QUIT, pg.WINDOWCLOSE)
+
 
 class Game(object):
-    def __init__(self):
-        pg.init()
-        pg.mixer.init()
-        self.screen = pg.display.set_mode((WIDTH, HEIGHT))
-        pg.display.set_caption(TITLE)
-        self.clock = pg.time.Clock()
-        # Load graphics and sound
+    # fonts and rendered strings shared by every draw_text call
+    text = TextRenderer(TEXT_CACHE_SIZE)
+    # phases of a frame timed by the profiler
+    PHASES = ('starfield', 'sprites', 'hud', 'overlay', 'flip',
+              'collisions', 'events', 'update')
+
+    def __init__(self, headless=False, input=None, render=True,
+                 max_frames=None, clock=None, backend=None, scale=None,
+                 inputs=()):
+        # a headless game runs on SDL dummy drivers with a simulated clock,
+        # as fast as possible and without any window or sound card
+        self.headless = headless
+        # time spent in each startup phase, in ms
+        self.startup = OrderedDict(imports=(IMPORTED - LAUNCHED) * 1000)
+        self.startup_mark = time.perf_counter()
+        if headless:
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
+            os.environ['SDL_AUDIODRIVER'] = 'dummy'
+        # only what's needed to show the title, the mixer is started
+        # with the first game
+        pg.display.init()
+        pg.font.init()
+        self._setup_display(backend or BACKEND, scale or WINDOW_SCALE)
+        self._startup('display')
+        # game time only depends on the frames played, a window paces
+        # them in real time
+        if clock is None:
+            clock = SimClock() if headless else PacedClock(PACING_SPIN)
+        self.clock = clock
+        # sprites read the time of the step and set timers here
+        self.animator = Animator(clock)
+        # a window out of focus pauses the game and static screens sleep
+        self.scheduler = FrameScheduler(IDLE_FPS, pause=not headless)
+        self._setup_hud()
+        if input is None:
+            input = BotInput() if headless else KeyboardInput()
+        self.input = input
+        self.input_state = 0
+        # input sources of the ships of other players, one ship each
+        self.inputs = list(inputs)
+        # drawing can be skipped altogether when only gameplay matters
+        self.render = render
+        # stop playing after max_frames frames, None to play until the end
+        self.max_frames = max_frames
+        # frames before skip_to are played as fast as possible and not
+        # drawn, to seek into a replay
+        self.skip_to = 0
+        # a headless game draws once per step, a window RENDER_FPS times
+        # a second whatever the game steps
+        self.render_fps = FPS if headless else RENDER_FPS
+        # simulation steps played without drawing to keep up
+        self.frames_skipped = 0
+        # always on, F3 shows its overlay
+        self.profiler = FrameProfiler(Game.PHASES, PROFILER_FRAMES,
+                                      1000.0 / FPS)
+        # network server sent a snapshot after each step, if any
+        self.server = None
+        # stream of per frame metrics, see start_telemetry
+        self.telemetry = None
+        # collisions resolved since the last frame recorded
+        self.collisions = 0
+        # broadphase rebuilt from each group before its collision pass
+        self.grid = SpatialHash(GRID_CELL_SIZE)
+        # sprite pools of the game played, made by reset
+        self.pools = {}
+        # Load graphics and sound on a thread pool, the title screen shows
+        # the progress and headless games wait for them right away
+        self.loader = Loader(LOADER_WORKERS)
         self._load_gfx()
         self._load_snd()
+        self._startup('setup')
+        if headless:
+            self.load()
         # Running indicates the game is in an active state
         self.running = True
 
+    def _setup_display(self, backend, scale):
+        ''' the screen surface and the renderer drawing the frames '''
+        if backend != 'surface' and TextureRenderer.available:
+            # the display surface only holds the static screens and gives
+            # the images their pixel format, frames go to the window of
+            # the renderer
+            self.screen = pg.display.set_mode((WIDTH, HEIGHT), pg.HIDDEN)
+            self.renderer = TextureRenderer(self.screen, TITLE, scale,
+                                            accelerated=backend == 'texture')
+            return
+        self.screen = pg.display.set_mode((WIDTH, HEIGHT))
+        pg.display.set_caption(TITLE)
+        if RENDERER == 'dirty':
+            self.renderer = DirtyRenderer(self.screen, DIRTY_RECTS_MAX)
+        else:
+            self.renderer = FullRenderer(self.screen)
+
     def new(self):
         ''' start up a brand new game '''
+        self.load()
+        self.reset()
+        # the mixer is only started once a game starts
+        if self.music is None:
+            self.music = self.audio.start() and self._load_music()
+        else:
+            self.audio.start()
+        # Play background music and let's get started !
+        if self.music:
+            pg.mixer.music.play(loops=-1)
+        self.run()
+
+    def reset(self, mobs=None, swarm=None):
+        ''' create the sprites of a brand new game with MOBS_INIT mobs by
+        default, waves of SWARM_MOBS mobs or more are run by the swarm
+        engine unless swarm is given '''
+        if mobs is None:
+            mobs = MOBS_INIT
+        # a game only depends on the seed and inputs, not on when it starts
+        self.clock.reset()
+        self.animator.reset()
         # Create group and sprites
         self.all_sprites = pg.sprite.Group()
         self.mobs = pg.sprite.Group()
         self.bullets = pg.sprite.Group()
         self.powerups = pg.sprite.Group()
-        self.starfield = Starfield(200)
-
-        self.player = Player(self)
-        self.all_sprites.add(self.player)
+        self.starfield = Starfield(STARS)
+
+        # the first ship is the player's, the others spread out along
+        # the bottom of the screen
+        count = 1 + len(self.inputs)
+        self.players = [Player(self, index, WIDTH * (index + 1) / (count + 1))
+                        for index in range(count)]
+        self.player = self.players[0]
+        self.all_sprites.add(self.players)
+        self.explosion = None
         self.score = 0
+        # mobs shot down and power-ups caught
+        self.kills = 0
+        self.powerups_caught = 0
+
+        self.frame = 0
+        # sprite centers before the last step, drawn sprites are
+        # interpolated from there
+        self.positions = {}
+        self.renderer.reset()
+        # sprites often created and killed are recycled
+        self.pools = {
+            'bullet': Pool(Bullet, self),
+            'explosion': Pool(Explosion, self),
+            'mob': Pool(Mob, self),
+            'powerup': Pool(PowerUp, self),
+        }
+
+        if swarm is None:
+            swarm = mobs >= SWARM_MOBS
+        self.swarm = None
+        if swarm:
+            self.swarm = Swarm(self, mobs)
+        else:
+            for _ in range(mobs):
+                self._respawn_mob()
 
-        for _ in range(8):
-            self._respawn_mob()
-
-        # Play background music and let's get started !
-        pg.mixer.music.play(loops=-1)
-        self.run()
+    def record(self):
+        ''' seed random for the next game and record its inputs, return
+        the replay '''
+        seed = random.getrandbits(32)
+        random.seed(seed)
+        replay = Replay(seed, FPS)
+        source = self.input
+        if isinstance(source, RecordingInput):
+            source = source.source
+        self.input = RecordingInput(source, replay)
+        return replay
 
     def run(self):
-        ''' main game loop after initialization '''
+        ''' main game loop after initialization
+
+        The game plays FPS steps of game time per second of real time
+        whatever the rate frames are drawn at: the real time elapsed
+        is played in fixed steps and the frame drawn interpolates the
+        sprites between the last two steps. When the machine can't keep
+        up, up to MAX_FRAMESKIP steps are played before drawing a frame,
+        past that the game slows down.
+        '''
         # Playing indicates the game has actually started
         self.playing = True
+        step = 1000.0 / FPS
+        lag = 0.0
         while self.playing:
-            self.clock.tick(FPS)
+            if self.frame < self.skip_to:
+                self.profiler.begin()
+                self._simulate()
+                if self._ended():
+                    self.playing = False
+            elif self.scheduler.paused:
+                self._pause()
+                lag = 0.0
+                continue
+            else:
+                lag += self.clock.tick(self.scheduler.fps(self.render_fps))
+                self.profiler.begin()
+                steps = 0
+                while self.playing and lag >= step and steps < MAX_FRAMESKIP:
+                    self._simulate()
+                    if self._ended():
+                        self.playing = False
+                    lag -= step
+                    steps += 1
+                if steps > 1:
+                    self.frames_skipped += steps - 1
+                if steps == MAX_FRAMESKIP:
+                    lag %= step
+                if self.render and self.scheduler.visible:
+                    self.draw(lag / step)
+            self.profiler.end()
+            if self.telemetry is not None:
+                self._record_telemetry()
+
+    def _pause(self):
+        ''' sleep until the window is back, the game stands still '''
+        for event in self.scheduler.wait(IDLE_WAIT):
+            if event.type in QUIT:
+                self.playing = self.running = False
+            elif event.type == pg.WINDOWEXPOSED and self.render:
+                self.renderer.expose()
+        # the real time spent paused is not played
+        self.clock.tick(0)
+
+    def _ended(self):
+        ''' Loop condition to end the game, once no ship in the game has
+        lives left and the last explosion is over '''
+        lives = sum(player.lives for player in self.players
+                    if player.playing)
+        if lives == 0 and (self.explosion is None or
+                           not self.explosion.alive()):
+            return True
+        return self.max_frames is not None and self.frame >= self.max_frames
+
+    def step(self):
+        ''' draw a frame then play one step '''
+        self.profiler.begin()
+        if self.render:
             self.draw()
-            self.events()
-            self.update()
-            # Loop condition to end the game
-            if self.player.lives == 0 and not self.explosion.alive():
-                self.playing = False
-
-    def draw(self):
-        ''' draw objects on screen '''
-        self.screen.fill((0, 0, 0))
-        self.starfield.draw_stars(self.screen)
-        self.all_sprites.draw(self.screen)
-        Game.draw_text(self.screen, "Score = {}".format(self.score),
-                       size=20,
-                       pos=(WIDTH / 2, 10))
-        Game.draw_shield_bar(self.screen, 5, 5, self.player.shield)
-        Game.draw_lives(self.screen, 700, 5,
-                        self.player.lives, self.player_mini_img)
-        Game.draw_text(self.screen,
-                       "Velocity = {}".format(self.player.velocity),
-                       size=20,
-                       pos=(100, 50))
-        Game.draw_text(self.screen,
-                       "Position= {}".format(self.player.position),
-                       size=20,
-                       pos=(100, 100))
-        self._detect_collisions()
+        self._simulate()
+        self.profiler.end()
+
+    def _simulate(self):
+        ''' play one step of game time '''
+        self.clock.advance(FPS)
+        self.animator.tick()
+        self.collisions += self._detect_collisions()
+        self.profiler.mark('collisions')
+        self.events()
+        self.profiler.mark('events')
+        self.update()
+        self.profiler.mark('update')
+        self.frame += 1
+        if self.server is not None:
+            self.server.send_snapshot(self)
+
+    def draw(self, alpha=1.0):
+        ''' draw objects on screen, alpha of the way from their position
+        before the last step to the current one '''
+        renderer = self.renderer
+        renderer.clear()
+        renderer.draw_stars(self.starfield)
+        self.profiler.mark('starfield')
+        self._draw_sprites(alpha)
+        self.profiler.mark('sprites')
+        renderer.draw_hud(self.hud)
+        self.profiler.mark('hud')
+        if self.profiler.overlay:
+            renderer.paint(lambda surface: self.profiler.draw_overlay(
+                surface, Game.text, WIDTH - PROFILER_FRAMES - 10, 150
+            ))
+            self.profiler.mark('overlay')
+        renderer.present()
+        self.profiler.mark('flip')
+
+    def _draw_sprites(self, alpha):
+        # a renderer which rotates is given what mobs were rotated from
+        rotates = self.renderer.rotates
+        if self.swarm is not None:
+            self.renderer.blits(self.swarm.blits(alpha, rotates))
+        if alpha < 1.0:
+            self.renderer.blits(self._interpolated(alpha, rotates))
+        else:
+            self.renderer.draw_group(self.all_sprites)
+
+    def _setup_hud(self):
+        ''' HUD widgets, each one repainted when the value it shows
+        changes '''
+        self.hud = Hud()
+        self.hud.add((WIDTH / 2 - 100, 10, 200, 20),
+                     lambda: self.score,
+                     lambda surface, score: Game.draw_text(
+                         surface, "Score = {}".format(score),
+                         size=20, pos=(100, 0), glyphs=True))
+        self.hud.add((5, 5, 100, 10),
+                     lambda: self.player.shield,
+                     lambda surface, shield: Game.draw_shield_bar(
+                         surface, 0, 0, shield))
+        # lives are drawn from the right, 30 pixels apart
+        self.hud.add((700 - 30 * (LIVES - 1), 5, 30 * LIVES, 20),
+                     lambda: self.player.lives,
+                     lambda surface, lives: Game.draw_lives(
+                         surface, 30 * (LIVES - 1), 0, lives,
+                         self.player_mini_img))
+        # vectors change in place, the text is compared instead
+        self.hud.add((0, 50, 250, 20),
+                     lambda: "Velocity = {}".format(self.player.velocity),
+                     lambda surface, text: Game.draw_text(
+                         surface, text, size=20, pos=(100, 0), glyphs=True))
+        self.hud.add((0, 100, 250, 20),
+                     lambda: "Position= {}".format(self.player.position),
+                     lambda surface, text: Game.draw_text(
+                         surface, text, size=20, pos=(100, 0), glyphs=True))
+
+    def _interpolated(self, alpha, rotations=False):
+        ''' (image, rect) of the sprites alpha of the way from their
+        position before the last step, and their rotation when asked '''
+        sequence = []
+        back = 1.0 - alpha
+        for sprite in self.all_sprites:
+            rect = sprite.rect
+            previous = self.positions.get(sprite)
+            if previous is not None:
+                dx = int(round((previous[0] - rect.centerx) * back))
+                dy = int(round((previous[1] - rect.centery) * back))
+                # longer moves are respawns, not worth interpolating
+                if abs(dx) < TELEPORT and abs(dy) < TELEPORT:
+                    rect = rect.move(dx, dy)
+            if rotations:
+                sequence.append((sprite.image, rect,
+                                 getattr(sprite, 'rotation', None)))
+            else:
+                sequence.append((sprite.image, rect))
+        return sequence
 
     def _detect_collisions(self):
-        self._laser_with_mobs_collision()
-        self._player_with_powerup_collision()
-        self._player_with_mobs_collision()
+        ''' resolve the collisions of a step, return how many there were '''
+        return (self._laser_with_mobs_collision() +
+                self._player_with_powerup_collision() +
+                self._player_with_mobs_collision())
 
     def _laser_with_mobs_collision(self):
-        hits = pg.sprite.groupcollide(
-            groupa=self.mobs,
-            groupb=self.bullets,
-            dokilla=True,
-            dokillb=True
-        )
-        for hit in hits:
-            self.score += hit.radius
+        if self.swarm is not None:
+            hits = self.swarm.collide_bullets()
+        else:
+            hits = self._sprites_collision()
+        for radius, center in hits:
+            self.score += radius
+            self.kills += 1
             # show and play explosion
-            self.explosion = Explosion(self, hit.rect.center, size='large')
+            self.explosion = self.pools['explosion'].acquire(center, 'large')
             self.all_sprites.add(self.explosion)
-            self.mobs_explode_snd.play()
+            self.audio.play('mobs_explode')
             self._respawn_mob()
             # randomly yield bonus under the collided mob
             if random.random() > BONUS_ODD:
-                shield = PowerUp(self, hit.rect.center)
+                shield = self.pools['powerup'].acquire(center)
                 self.powerups.add(shield)
                 self.all_sprites.add(shield)
+        return len(hits)
+
+    def _sprites_collision(self):
+        ''' kill the mobs and bullets colliding, return the (radius,
+        center) of the mobs killed '''
+        # same as pg.sprite.groupcollide(mobs, bullets, True, True)
+        # with bullets looked up through the grid
+        self.grid.rebuild(self.bullets)
+        hits = []
+        for mob in self.mobs.sprites():
+            collision = self.grid.spritecollide(mob, dokill=True)
+            if collision:
+                # killed mobs go back to their pool and may be reused
+                # before the end of the loop, keep what we need of them
+                hits.append((mob.radius, mob.rect.center))
+                mob.kill()
+        return hits
 
     def _player_with_powerup_collision(self):
-        hits = pg.sprite.spritecollide(
-            sprite=self.player,
-            group=self.powerups,
-            dokill=True
-        )
-        for hit in hits:
-            if hit.type == 'shield':
-                self.player.shield += random.randrange(10, 30)
-                self.powerup_shield_snd.play()
-                if self.player.shield > SHIELD_MAX:
-                    self.player.shield = SHIELD_MAX
-            if hit.type == 'bolt_silver':
-                self.player.shot_delay -= 150
-                self.powerup_laser_snd.play()
-                if self.player.shot_delay < SHOTDELAY_MAX:
-                    self.player.shot_delay = SHOTDELAY_MAX
-            if hit.type == 'bolt_gold':
-                self.powerup_laser_snd.play()
-                self.player.powerup()
+        self.grid.rebuild(self.powerups)
+        caught = 0
+        for player in self.players:
+            hits = self.grid.spritecollide(
+                sprite=player,
+                dokill=True
+            )
+            caught += len(hits)
+            for hit in hits:
+                if hit.type == 'shield':
+                    player.shield += random.randrange(10, 30)
+                    self.audio.play('powerup_shield')
+                    if player.shield > SHIELD_MAX:
+                        player.shield = SHIELD_MAX
+                if hit.type == 'bolt_silver':
+                    player.shot_delay -= 150
+                    self.audio.play('powerup_laser')
+                    if player.shot_delay < SHOTDELAY_MAX:
+                        player.shot_delay = SHOTDELAY_MAX
+                if hit.type == 'bolt_gold':
+                    self.audio.play('powerup_laser')
+                    player.powerup()
+        self.powerups_caught += caught
+        return caught
 
     def _player_with_mobs_collision(self):
-        hits = pg.sprite.spritecollide(
-            sprite=self.player,
-            group=self.mobs,
-            dokill=True,
-            collided=pg.sprite.collide_circle
-        )
-        for hit in hits:
-            self.player.shield -= hit.radius * 2
-
-            if self.player.shield <= 0:
-                # explode the ship !
-                position = self.player.rect.center
-                self.explosion = Explosion(self, position, size='player')
-                self.all_sprites.add(self.explosion)
-                self.ship_explode_snd.play()
-                self.player.lives -= 1
-                self.player.power_level = 1
-                self.player.shield = SHIELD_MAX
-                self.player.shot_delay = SHOTDELAY_INIT
-                self.player.hide()
+        if self.swarm is None:
+            self.grid.rebuild(self.mobs)
+        collisions = 0
+        for player in self.players:
+            if self.swarm is not None:
+                hits = self.swarm.collide_player(player)
             else:
-                # show and play explosion
-                explosion = Explosion(self, hit.rect.center)
-                self.all_sprites.add(explosion)
-                self.mobs_explode_snd.play()
-                self._respawn_mob()
+                hits = self.grid.spritecollide(
+                    sprite=player,
+                    dokill=True,
+                    collided=collide_mask
+                )
+                # copied before the mobs are reused by _respawn_mob
+                hits = [(hit.radius, hit.rect.center) for hit in hits]
+            collisions += len(hits)
+            for radius, center in hits:
+                player.shield -= radius * 2
+
+                if player.shield <= 0:
+                    # explode the ship !
+                    position = player.rect.center
+                    self.explosion = Explosion(self, position,
+                                               size='player')
+                    self.all_sprites.add(self.explosion)
+                    self.audio.play('ship_explode')
+                    player.lives -= 1
+                    player.power_level = 1
+                    player.shield = SHIELD_MAX
+                    player.shot_delay = SHOTDELAY_INIT
+                    player.hide()
+                else:
+                    # show and play explosion
+                    explosion = self.pools['explosion'].acquire(center)
+                    self.all_sprites.add(explosion)
+                    self.audio.play('mobs_explode')
+                    self._respawn_mob()
+        return collisions
 
     def events(self):
         ''' manage events/interactions with users '''
-        for event in pg.event.get():
-            if event.type == pg.QUIT:
+        events = pg.event.get()
+        self.scheduler.handle(events)
+        for event in events:
+            if event.type in QUIT:
                 self.playing = self.running = False
-            if event.type == pg.KEYDOWN:
-                if event.key == pg.K_SPACE:
-                    self.player.shoot()
+            if event.type == pg.KEYDOWN and event.key == pg.K_F3:
+                self.profiler.toggle_overlay()
+        # keys held or pressed during this frame come from the input source
+        self.input_state = self.input.poll(self, events)
+        self.player.keys = self.input_state
+        for player, source in zip(self.players[1:], self.inputs):
+            player.keys = source.poll(self, events)
+        for player in self.players:
+            if player.keys & FIRE:
+                player.shoot()
 
     def update(self):
-        ''' update screen after drawing and checking events '''
+        ''' update sprites after drawing and checking events '''
+        if self.render:
+            self.positions = {sprite: sprite.rect.center
+                              for sprite in self.all_sprites}
+        self.animator.update()
         self.all_sprites.update()
-        pg.display.flip()
+        self.starfield.update()
+        if self.swarm is not None:
+            self.swarm.update()
+
+    def build_assets(self):
+        ''' decode the graphics and write the atlas cache '''
+        sources = self._gfx_sources()
+        cache = self._gfx_cache(sources)
+        cache.save(self._decode_gfx(sources))
+
+    def load(self):
+        ''' wait for graphics and sounds to be loaded '''
+        self.loader.wait()
+        self._startup('assets')
+
+    def show_loading(self):
+        ''' show the loading progress until assets are ready '''
+        while self.running and not self.loader.finished:
+            self._draw_title(self.loader.poll())
+            for event in self.scheduler.wait(1000.0 / FPS):
+                if event.type in QUIT:
+                    self.running = False
+        self._startup('assets')
 
     def show_title(self):
+        self.show_loading()
+        if not self.running:
+            return
+        self._draw_title()
+        self._wait_kepress()
+
+    def _draw_title(self, progress=None):
         self.screen.fill((0, 0, 0))
         Game.draw_text(self.screen, "PySpaceX", 80, (WIDTH / 2, HEIGHT / 2))
-        Game.draw_text(self.screen,
-                       "Press any key to continue...",
-                       20,
-                       (WIDTH / 2, HEIGHT / 2 + 80))
-        pg.display.flip()
-        self._wait_kepress()
+        if progress is None:
+            Game.draw_text(self.screen,
+                           "Press any key to continue...",
+                           20,
+                           (WIDTH / 2, HEIGHT / 2 + 80))
+        else:
+            Game.draw_shield_bar(self.screen, WIDTH / 2 - 50,
+                                 HEIGHT / 2 + 85, progress * 100)
+        self.renderer.show()
+        self._startup('first frame')
 
     def show_gameover(self):
         # don't bother showing gameover if wants to close the window
@@ -199,117 +578,285 @@ class Game(object):
                        "Press any key to continue",
                        20,
                        (WIDTH / 2, HEIGHT - 20))
-        pg.display.flip()
+        self.renderer.show()
         self._wait_kepress()
 
     def _wait_kepress(self):
+        ''' sleep until a key is pressed or the window closed '''
         waiting = True
         while waiting:
-            for event in pg.event.get():
-                if event.type == pg.QUIT:
+            for event in self.scheduler.wait(IDLE_WAIT):
+                if event.type in QUIT:
                     waiting = False
                     self.running = False
                 elif event.type == pg.KEYDOWN:
                     waiting = False
+                elif event.type == pg.WINDOWEXPOSED:
+                    self.renderer.expose()
 
     def _load_gfx(self):
-        ''' Load all game graphics '''
-        self.background = pg.image.load(
-            os.path.join(IMG_PATH, 'Background/space_background.png')
-        ).convert()
+        ''' Queue the loading of all game graphics, from the atlas cache
+        when it is up to date with the image files '''
+        sources = self._gfx_sources()
+        cache = self._gfx_cache(sources)
+        manifest = cache.manifest()
+        images = OrderedDict((name, None) for name in sources)
+
+        if manifest is not None:
+            def read():
+                try:
+                    return cache.read()
+                except (OSError, ValueError):
+                    return None
+
+            def unpack(pixels):
+                unpacked = pixels and cache.unpack(manifest, pixels)
+                if not unpacked:
+                    unpacked = self._decode_gfx(sources)
+                    cache.save(unpacked)
+                images.clear()
+                images.update(unpacked)
+            self.loader.add(read, unpack)
+        else:
+            # decode on the workers, convert on the main thread
+            def convert(name, image):
+                images[name] = image.convert()
+            for name, path in sources.items():
+                self.loader.add(partial(pg.image.load, path),
+                                partial(convert, name))
+            self.loader.then(lambda: cache.save(self._derive_gfx(images)))
+        self.loader.then(lambda: self._setup_gfx(images))
+
+    def _setup_gfx(self, images):
+        # every image gets the blit format of its class once and for all,
+        # sprites never change the surfaces they share
+        self.formats = SurfaceFormats(SURFACE_FORMATS, BLACK)
+        for name, image in images.items():
+            images[name] = self.formats.prepare(name, image)
+
+        self.background = images['background']
         self.background_rect = self.background.get_rect()
 
-        self.player_img = pg.image.load(
-            os.path.join(IMG_PATH, 'Ships/playerShip1_blue.png')
-        ).convert()
+        self.player_img = images['player']
+        # ship of each player of a network game
+        self.players_img = [images['player'], images['player/2']]
 
-        self.player_mini_img = pg.transform.scale(self.player_img, (25, 19))
-        self.player_mini_img.set_colorkey(rgb('black'))
+        self.player_mini_img = images['player_mini']
 
-        self.laser_img = pg.image.load(
-            os.path.join(IMG_PATH, 'Lasers/laserRed16.png')
-        ).convert()
+        self.laser_img = images['laser']
 
-        self.meteors_img = []
-        for meteor_path in glob.glob(os.path.join(IMG_PATH, "Meteors/*.png")):
-            self.meteors_img.append(pg.image.load(meteor_path).convert())
+        self.meteors_img = [image for name, image in images.items()
+                            if name.startswith('meteors/')]
+        # rotated meteors are shared by all mobs and built on first use
+        self.rotation_cache = RotationCache(
+            ROTATION_STEPS, ROTATION_CACHE_SIZE,
+            partial(self.formats.prepare, 'meteors'))
 
         self.powerups_img = {}
-        self.powerups_img['shield'] = pg.image.load(
-            os.path.join(IMG_PATH, 'Powerups/shield_gold.png')
-        ).convert()
-        self.powerups_img['bolt_silver'] = pg.image.load(
-            os.path.join(IMG_PATH, 'Powerups/bolt_silver.png')
-        ).convert()
-        self.powerups_img['bolt_gold'] = pg.image.load(
-            os.path.join(IMG_PATH, 'Powerups/bolt_gold.png')
-        ).convert()
-
-        self.explosions_anim = {}
-        self.explosions_anim['large'] = []
-        self.explosions_anim['small'] = []
-        self.explosions_anim['player'] = []
-        for _ in range(8):
-            img_path = os.path.join(
-                EXPLOD_PATH,
-                "regularExplosion0{}.png".format(_)
-            )
-            img = pg.image.load(img_path).convert()
-            img.set_colorkey(rgb('black'))
-            self.explosions_anim['large'].append(
-                pg.transform.scale(img, (75, 75))
+        for powerup in ('shield', 'bolt_silver', 'bolt_gold'):
+            self.powerups_img[powerup] = images['powerups/' + powerup]
+
+        # the ship explosion is only needed once the player gets hit,
+        # it is loaded in the background and until then a large explosion
+        # of as many frames stands in for it rather than stall the game
+        paths = [os.path.join(EXPLOD_PATH, "sonicExplosion0{}.png".format(_))
+                 for _ in range(8)]
+        self.explosions_anim = LazyAssets({
+            'player': self.loader.lazy(
+                lambda: [pg.image.load(path) for path in paths],
+                lambda imgs: [self.formats.prepare('explosions', img.convert())
+                              for img in imgs]
             )
-
-            self.explosions_anim['small'].append(
-                pg.transform.scale(img, (32, 32))
-            )
-            img_path = os.path.join(
-                EXPLOD_PATH,
-                "sonicExplosion0{}.png".format(_)
-            )
-            img = pg.image.load(img_path).convert()
-            img.set_colorkey(rgb('black'))
-            self.explosions_anim['player'].append(img)
-
-    def _load_snd(self):
-        # Load all sounds
-        self.laser_snd = pg.mixer.Sound(
-            os.path.join(SND_PATH, 'laser.wav')
+        })
+        for size in ('large', 'small'):
+            self.explosions_anim[size] = [
+                images['explosions/{}/{}'.format(size, _)] for _ in range(8)
+            ]
+        self.explosions_anim.fallbacks['player'] = \
+            self.explosions_anim['large']
+
+    def _gfx_cache(self, sources):
+        # the cache is stale as soon as _derive_gfx scales differently
+        params = {'player': PLAYER_SIZE, 'player_mini': PLAYER_MINI_SIZE,
+                  'explosions': EXPLOSION_SIZES}
+        return AssetCache(CACHE_PATH, sorted(set(sources.values())),
+                          ATLAS_WIDTH, params)
+
+    def _gfx_sources(self):
+        ''' image files of the game graphics by name '''
+        sources = OrderedDict()
+        sources['background'] = os.path.join(
+            IMG_PATH, 'Background/space_background.png'
         )
-        self.mobs_explode_snd = pg.mixer.Sound(
-            os.path.join(SND_PATH, 'mobs_explode.wav')
+        sources['player'] = os.path.join(
+            IMG_PATH, 'Ships/playerShip1_blue.png'
         )
-        self.ship_explode_snd = pg.mixer.Sound(
-            os.path.join(SND_PATH, 'ship_explode.wav')
+        sources['player/2'] = os.path.join(
+            IMG_PATH, 'Ships/playerShip1_green.png'
         )
-        self.powerup_laser_snd = pg.mixer.Sound(
-            os.path.join(SND_PATH, 'powerup_laser.wav')
+        sources['laser'] = os.path.join(IMG_PATH, 'Lasers/laserRed16.png')
+        # sorted so that meteors come in the same order on every machine
+        for meteor_path in sorted(
+                glob.glob(os.path.join(IMG_PATH, "Meteors/*.png"))):
+            name = 'meteors/' + os.path.basename(meteor_path)
+            sources[name] = meteor_path
+        sources['powerups/shield'] = os.path.join(
+            IMG_PATH, 'Powerups/shield_gold.png'
         )
-        self.powerup_shield_snd = pg.mixer.Sound(
-            os.path.join(SND_PATH, 'powerup_shield.wav')
+        sources['powerups/bolt_silver'] = os.path.join(
+            IMG_PATH, 'Powerups/bolt_silver.png'
         )
-        # Load background music
-        pg.mixer.music.load(
-            os.path.join(SND_PATH, 'background.ogg')
+        sources['powerups/bolt_gold'] = os.path.join(
+            IMG_PATH, 'Powerups/bolt_gold.png'
         )
+        for _ in range(8):
+            sources['explosions/regular/{}'.format(_)] = os.path.join(
+                EXPLOD_PATH,
+                "regularExplosion0{}.png".format(_)
+            )
+        return sources
+
+    def _decode_gfx(self, sources):
+        ''' decode the image files and derive the scaled images '''
+        images = OrderedDict()
+        for name, path in sources.items():
+            images[name] = pg.image.load(path).convert()
+        return self._derive_gfx(images)
+
+    def _derive_gfx(self, images):
+        ''' scale the decoded images to their sizes in the game, the
+        parameters of _gfx_cache '''
+        player = images['player']
+        images['player_mini'] = pg.transform.scale(player, PLAYER_MINI_SIZE)
+        images['player'] = pg.transform.scale(player, PLAYER_SIZE)
+        images['player/2'] = pg.transform.scale(images['player/2'],
+                                                PLAYER_SIZE)
+        for _ in range(8):
+            img = images.pop('explosions/regular/{}'.format(_))
+            for size, scale in sorted(EXPLOSION_SIZES.items()):
+                images['explosions/{}/{}'.format(size, _)] = \
+                    pg.transform.scale(img, scale)
+        return images
+
+    def _load_snd(self):
+        ''' Queue the loading of all sounds, power-up sounds are only
+        needed once a power-up is caught, they load in the background and
+        aren't played until they are loaded '''
+        def sound(name):
+            return partial(Game._read, os.path.join(SND_PATH, name + '.wav'))
+        lazy = ('powerup_laser', 'powerup_shield')
+        self.sounds = LazyAssets(
+            {name: self.loader.lazy(sound(name)) for name in lazy},
+            {name: None for name in lazy})
+        for name in ('laser', 'mobs_explode', 'ship_explode'):
+            self.loader.add(sound(name),
+                            partial(self.sounds.__setitem__, name))
+        # gameplay requests sounds through the voice manager
+        self.audio = SoundManager(self.sounds, SOUND_CHANNELS, SOUNDS,
+                                  SOUND_VOLUME, SOUND_MERGE_TIME)
+        # the background music is loaded once the mixer is started
+        self.music = False if self.headless else None
+
+    @staticmethod
+    def _read(path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def _load_music(self):
+        ''' load the background music, return whether it is available '''
+        try:
+            pg.mixer.music.load(
+                os.path.join(SND_PATH, 'background.ogg')
+            )
+        except pg.error:
+            return False
         pg.mixer.music.set_volume(0.4)
+        return True
+
+    def _startup(self, phase):
+        ''' account the time since the previous phase to phase, the first
+        time it ends '''
+        if phase in self.startup:
+            return
+        now = time.perf_counter()
+        self.startup[phase] = (now - self.startup_mark) * 1000
+        self.startup_mark = now
+
+    def startup_report(self):
+        lines = ["{:<12}{:>9}".format('startup', 'ms')]
+        for phase, elapsed in self.startup.items():
+            lines.append("{:<12}{:>9.1f}".format(phase, elapsed))
+        lines.append("{:<12}{:>9.1f}".format(
+            'total', sum(self.startup.values())))
+        return '\n'.join(lines)
+
+    def report(self):
+        ''' frame profile, sprite pools and sound voices usage '''
+        lines = [self.profiler.report()]
+        lines.append("{} steps played without drawing".format(
+            self.frames_skipped))
+        for name, pool in sorted(self.pools.items()):
+            lines.append("{:<10} {}".format(name, ', '.join(
+                '{} {}'.format(key, value)
+                for key, value in sorted(pool.stats().items()))))
+        for name, stats in sorted(self.audio.stats.items()):
+            lines.append("{:<14} {}".format(name, ', '.join(
+                '{} {}'.format(key, value)
+                for key, value in sorted(stats.items()))))
+        return '\n'.join(lines)
+
+    def start_telemetry(self, path=None, port=None):
+        ''' stream per frame metrics to gzipped column files in the path
+        directory and serve the last ones on localhost:port '''
+        self.telemetry = Telemetry(path, TELEMETRY_CAPACITY,
+                                   TELEMETRY_BATCH, port)
+
+    def _record_telemetry(self):
+        profiler = self.profiler
+        player = self.player
+        # len() of a group copies its sprites list, spritedict doesn't
+        self.telemetry.record((
+            self.frame, int(profiler.last_frame * 1000),
+            profiler.last_frame > profiler.budget,
+            len(self.mobs.spritedict), len(self.bullets.spritedict),
+            len(self.powerups.spritedict), len(self.all_sprites.spritedict),
+            self.collisions, self.score, player.shield, player.power_level))
+        self.collisions = 0
+
+    def stop_telemetry(self):
+        ''' save the metrics left '''
+        if self.telemetry is not None:
+            self.telemetry.close()
+            self.telemetry = None
+
+    def fire(self, x, y):
+        ''' shoot a bullet whose bottom middle is at x, y '''
+        if self.swarm is not None:
+            self.swarm.fire(x, y)
+            return
+        bullet = self.pools['bullet'].acquire(x, y)
+        self.all_sprites.add(bullet)
+        self.bullets.add(bullet)
+
+    def bullets_count(self):
+        ''' number of bullets on screen '''
+        if self.swarm is not None:
+            return self.swarm.bullets
+        return len(self.bullets)
 
     def _respawn_mob(self):
         ''' Create a mob sprite and add it to all_sprites and mobs
-        sprites group'''
-        m = Mob(self)
+        sprites group, swarm mobs are respawned in place when hit '''
+        if self.swarm is not None:
+            return
+        m = self.pools['mob'].acquire()
         self.all_sprites.add(m)
         self.mobs.add(m)
 
     @staticmethod
-    def draw_text(surface, text, size, pos):
-        # font = pg.font.Font(FONT_NAME, size)
-        font = pg.font.Font(None, size)
-        text_surface = font.render(text, True, rgb('white'))
-        text_rect = text_surface.get_rect()
-        x, y = pos
-        text_rect.midtop = (x, y)
-        surface.blit(text_surface, text_rect)
+    def draw_text(surface, text, size, pos, glyphs=False):
+        ''' draw white text centered on pos, see TextRenderer.draw '''
+        return Game.text.draw(surface, text, size, pos, WHITE, glyphs)
 
     @staticmethod
     def draw_shield_bar(surface, x, y, shield_value):
@@ -327,25 +874,137 @@ class Game(object):
             fill_length - PADDING,
             BAR_HEIGHT - 3
         )
-        pg.draw.rect(surface, rgb('white'), outline_rect, PADDING)
-        pg.draw.rect(surface, rgb('green'), inline_rect)
+        pg.draw.rect(surface, WHITE, outline_rect, PADDING)
+        pg.draw.rect(surface, GREEN, inline_rect)
+        return outline_rect
 
     @staticmethod
     def draw_lives(surface, x, y, lives, img):
+        area = pg.Rect(x, y, 0, 0)
         for i in range(lives):
             img_rect = img.get_rect()
             img_rect.x = x - 30 * i
             img_rect.y = y
-            surface.blit(img, img_rect)
+            area.union_ip(surface.blit(img, img_rect))
+        return area
 
 
 if __name__ == "__main__":
-    spacex = Game()
+    parser = argparse.ArgumentParser(description=TITLE)
+    parser.add_argument('--headless', action='store_true',
+                        help='play one game with a bot, without display')
+    parser.add_argument('--frames', type=int,
+                        help='stop a headless game after that many frames')
+    parser.add_argument('--seed', type=int, help='random seed')
+    parser.add_argument('--build-assets', action='store_true',
+                        help='rebuild the graphics cache and exit')
+    parser.add_argument('--profile', action='store_true',
+                        help='print frame phases timings when leaving')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='print the startup phases timings once the '
+                        'title is shown and the assets loaded, then exit')
+    parser.add_argument('--record', metavar='FILE',
+                        help='save a replay of the last game played')
+    parser.add_argument('--replay', metavar='FILE',
+                        help='play back a replay')
+    parser.add_argument('--fast', action='store_true',
+                        help='play the replay as fast as possible, '
+                        'without display')
+    parser.add_argument('--skip-to', type=int, default=0, metavar='FRAME',
+                        help='play the replay without drawing up to FRAME')
+    parser.add_argument('--telemetry', metavar='DIR',
+                        help='stream per frame metrics to gzipped column '
+                        'files in DIR')
+    parser.add_argument('--telemetry-port', type=int, metavar='PORT',
+                        help='serve the last metrics on localhost:PORT')
+    parser.add_argument('--export-telemetry', nargs=2,
+                        metavar=('DIR', 'JSONL'),
+                        help='convert the telemetry columns in DIR to '
+                        'gzipped JSON lines and exit')
+    parser.add_argument('--backend', choices=('surface', 'texture',
+                                              'software'),
+                        help='draw on the display surface or with SDL '
+                        'textures, on the GPU or in software')
+    parser.add_argument('--scale', type=float,
+                        help='window size relative to the game, for the '
+                        'texture backends')
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    if args.export_telemetry:
+        print("{} frames exported".format(
+            Telemetry.export(*args.export_telemetry)))
+        sys.exit(0)
+
+    def telemetry(game):
+        if args.telemetry or args.telemetry_port:
+            game.start_telemetry(args.telemetry, args.telemetry_port)
+        return game
+
+    if args.replay:
+        replay = Replay.load(args.replay)
+        if replay.fps != FPS:
+            parser.error('replay recorded at {} fps'.format(replay.fps))
+        spacex = telemetry(Game(headless=args.fast, render=not args.fast,
+                                input=ReplayInput(replay),
+                                max_frames=len(replay),
+                                backend=args.backend, scale=args.scale))
+        spacex.skip_to = args.skip_to
+        random.seed(replay.seed)
+        spacex.new()
+        print("frames = {}, score = {}, lives = {}".format(
+            spacex.frame, spacex.score, spacex.player.lives))
+        if args.profile:
+            print(spacex.report())
+        spacex.stop_telemetry()
+        pg.quit()
+        sys.exit(0)
+
+    if args.profile_startup:
+        spacex = Game(headless=args.headless, backend=args.backend,
+                      scale=args.scale)
+        if not args.headless:
+            spacex.show_loading()
+            spacex._draw_title()
+        print(spacex.startup_report())
+        pg.quit()
+        sys.exit(0)
+
+    if args.build_assets:
+        Game(headless=True).build_assets()
+        pg.quit()
+        sys.exit(0)
+
+    if args.headless:
+        spacex = telemetry(Game(headless=True, render=False,
+                                max_frames=args.frames))
+        if args.record:
+            replay = spacex.record()
+        spacex.new()
+        if args.record:
+            replay.save(args.record)
+        print("frames = {}, score = {}, lives = {}".format(
+            spacex.frame, spacex.score, spacex.player.lives))
+        if args.profile:
+            print(spacex.report())
+        spacex.stop_telemetry()
+        pg.quit()
+        sys.exit(0)
+
+    spacex = telemetry(Game(backend=args.backend, scale=args.scale))
     spacex.show_title()
 
     while spacex.running:
+        if args.record:
+            replay = spacex.record()
         spacex.new()
+        if args.record:
+            replay.save(args.record)
         spacex.show_gameover()
 
+    if args.profile:
+        print(spacex.report())
+
+    spacex.stop_telemetry()
     pg.quit()
     sys.exit(0)
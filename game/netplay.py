@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+''' PySpaceX over the network
+
+The server plays the game, each of the first NET_PLAYERS clients to
+connect drives a ship of its own and any other client watches until a
+ship is free:
+
+    python netplay.py --serve
+    python netplay.py --connect HOST
+
+Clients predict their own ship from the input states the server hasn't
+played yet and show everything else as last received. --loopback plays
+a server and NET_PLAYERS scripted headless clients on local processes
+and reports the bytes sent per step and the latency from an input to
+its result:
+
+    python netplay.py --loopback --frames 1200 --loss 0.05
+'''
+import argparse
+import collections
+import json
+import multiprocessing
+import random
+import sys
+import time
+import pygame as pg
+
+from settings import *
+from main import Game
+from engine.Clock import PacedClock
+from engine.Input import ScriptedInput, LEFT, RIGHT, SHOOT
+from engine.Net import NetClient, NetServer
+from engine.Snapshot import ABSENT, BULLET, HIDDEN, MOB, NO_SHIP
+from engine.Snapshot import POWERUP, POWERUPS
+
+
+class RemoteGame(Game):
+    ''' Game shown by a network client
+
+    Nothing is simulated but the ship of the client: each step the
+    input state is sent to the server, then the ship is reset to the
+    last snapshot received and moved again by the states the server
+    hasn't played. The ships of the other players are shown as received,
+    a client which has no ship watches.
+    '''
+    def __init__(self, address, headless=False, input=None,
+                 max_frames=None, loss=0.0):
+        # steps are paced in real time like the server's, even headless
+        Game.__init__(self, headless=headless, input=input,
+                      render=not headless, max_frames=max_frames,
+                      clock=PacedClock(PACING_SPIN))
+        self.render_fps = FPS
+        # the server plays on, so does the client out of focus
+        self.scheduler.pause = False
+        self.net = NetClient(address, NET_HISTORY, NET_REDUNDANCY, loss)
+        self.entities = {}
+        # fields of every ship, the client's included
+        self.ships = ()
+        # (tick, state) played ahead of the server
+        self.predicted = collections.deque()
+
+    def reset(self, mobs=None, swarm=None):
+        Game.reset(self, mobs=0, swarm=False)
+        self.entities = {}
+        self.ships = ()
+        self.predicted.clear()
+        # the server may not have been heard of yet, it has until the
+        # timeout from now on
+        self.net.last_received = time.monotonic()
+
+    def _ended(self):
+        # over once no ship in the game has lives left
+        if self.ships and not sum(lives for _, _, _, lives, flags
+                                  in self.ships if not flags & ABSENT):
+            return True
+        if time.monotonic() - self.net.last_received > NET_TIMEOUT:
+            return True
+        return self.max_frames is not None and self.frame >= self.max_frames
+
+    def _simulate(self):
+        self.clock.advance(FPS)
+        self.animator.tick()
+        self.events()
+        self.profiler.mark('events')
+        self.frame += 1
+        self.net.send_input(self.frame, self.input_state)
+        self.predicted.append((self.frame, self.input_state))
+        snapshot = self.net.poll()
+        if snapshot is not None:
+            self._apply(snapshot)
+        elif not self.player.hidden:
+            self.player.move(self.input_state)
+        self.starfield.update()
+        self.profiler.mark('update')
+
+    def _apply(self, snapshot):
+        ''' take the server state then replay the inputs it hasn't '''
+        self.score = snapshot.score
+        self.ships = snapshot.players
+        self.entities = snapshot.entities
+        player = self.player
+        ship = self.net.ship
+        if ship >= len(self.ships):
+            # watching
+            player.hidden = True
+            player.rect.center = (0, 5000)
+            self.predicted.clear()
+            return
+        if ship != player.index:
+            player.index = ship
+            player.image = self.players_img[ship % len(self.players_img)]
+            player.mask = pg.mask.from_surface(player.image)
+        x, velocity, shield, lives, flags = self.ships[ship]
+        player.shield = shield
+        player.lives = lives
+        player.hidden = bool(flags & (HIDDEN | ABSENT))
+        player.position.x = x / 16.0
+        player.velocity.x = velocity / 256.0
+        player.rect.centerx = player.position.x
+        player.rect.bottom = player.position.y
+        while self.predicted and self.predicted[0][0] <= self.net.input_ack:
+            self.predicted.popleft()
+        if player.hidden:
+            player.rect.center = (0, 5000)
+        else:
+            for _, state in self.predicted:
+                player.move(state)
+
+    def _draw_sprites(self, alpha):
+        steps = self.rotation_cache.steps
+        rotates = self.renderer.rotates
+        sequence = []
+        for kind, x, y, aux in self.entities.values():
+            rotation = None
+            if kind == MOB:
+                rotation = (self.meteors_img[aux // steps],
+                            aux % steps * 360.0 / steps)
+                image = self.rotation_cache.get(*rotation)
+            elif kind == POWERUP:
+                image = self.powerups_img[POWERUPS[aux]]
+            else:
+                image = self.laser_img
+            rect = image.get_rect(center=(x, y))
+            if rotates:
+                sequence.append((image, rect, rotation))
+            else:
+                sequence.append((image, rect))
+        for index, (x, _, _, _, flags) in enumerate(self.ships):
+            if index == self.net.ship or flags & (HIDDEN | ABSENT):
+                continue
+            image = self.players_img[index % len(self.players_img)]
+            rect = image.get_rect(midbottom=(x // 16, HEIGHT))
+            if rotates:
+                sequence.append((image, rect, None))
+            else:
+                sequence.append((image, rect))
+        self.renderer.blits(sequence)
+        Game._draw_sprites(self, alpha)
+
+    def fire(self, x, y):
+        ''' bullets are fired by the server '''
+
+    def bullets_count(self):
+        return sum(1 for entity in self.entities.values()
+                   if entity[0] == BULLET)
+
+    def net_stats(self):
+        ''' traffic per step and input latency in ms '''
+        net = self.net
+        steps = max(self.frame, 1)
+        latencies = sorted(latency * 1000 for latency in net.latencies)
+        stats = collections.OrderedDict([
+            ('steps', self.frame),
+            # last ship played, -1 when watching
+            ('ship', net.ship if net.ship != NO_SHIP else -1),
+            ('snapshots', net.snapshots),
+            ('dropped', net.dropped),
+            ('down_bytes_per_step', net.bytes_received / steps),
+            ('up_bytes_per_step', net.bytes_sent / steps),
+        ])
+        if latencies:
+            stats['latency_mean'] = sum(latencies) / len(latencies)
+            stats['latency_p50'] = latencies[len(latencies) // 2]
+            stats['latency_p95'] = latencies[int(len(latencies) * 0.95)]
+            stats['latency_max'] = latencies[-1]
+        return stats
+
+
+def serve(port, seed=None, max_frames=None, ready=None):
+    ''' play one game of NET_PLAYERS ships from when the first client
+    connects, return the game and the server '''
+    server = NetServer(port, history=NET_HISTORY, backlog=NET_BACKLOG,
+                       timeout=NET_TIMEOUT, seats=NET_PLAYERS)
+    game = Game(headless=True, render=False, input=server.seats[0],
+                inputs=server.seats[1:], max_frames=max_frames,
+                clock=PacedClock(PACING_SPIN))
+    game.server = server
+    if ready is not None:
+        ready.set()
+    server.wait()
+    random.seed(seed)
+    game.new()
+    server.close()
+    return game, server
+
+
+def server_stats(game, server):
+    steps = max(game.frame, 1)
+    return collections.OrderedDict([
+        ('steps', game.frame),
+        ('score', game.score),
+        ('full_snapshots', server.snapshots['full']),
+        ('delta_snapshots', server.snapshots['delta']),
+        ('down_bytes_per_step', server.bytes_sent / steps),
+        ('up_bytes_per_step', server.bytes_received / steps),
+    ])
+
+
+def loopback_server(port, seed, ready, results):
+    game, server = serve(port, seed, ready=ready)
+    results.put(('server', server_stats(game, server)))
+
+
+def loopback_client(port, frames, loss, results, name='client', sweep=0):
+    # sweep the screen back and forth while shooting, each client on
+    # its own side first
+    input = ScriptedInput(
+        lambda frame: SHOOT | (LEFT if (frame // 60 + sweep) % 2 else RIGHT))
+    game = RemoteGame(('127.0.0.1', port), headless=True, input=input,
+                      max_frames=frames, loss=loss)
+    game.new()
+    game.net.close()
+    results.put((name, game.net_stats()))
+
+
+def loopback(port, frames, loss, seed):
+    ''' play a server and NET_PLAYERS clients on local processes, return
+    their stats '''
+    ready = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    server = multiprocessing.Process(target=loopback_server,
+                                     args=(port, seed, ready, results))
+    server.start()
+    ready.wait()
+    clients = [multiprocessing.Process(
+        target=loopback_client,
+        args=(port, frames, loss, results, 'client {}'.format(index + 1),
+              index)) for index in range(NET_PLAYERS)]
+    for client in clients:
+        client.start()
+    stats = dict(results.get() for _ in range(len(clients) + 1))
+    for client in clients:
+        client.join()
+    server.join()
+    return collections.OrderedDict(
+        [('server', stats.pop('server'))] + sorted(stats.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument('--serve', action='store_true',
+                      help='play a game for the first client to connect')
+    mode.add_argument('--connect', metavar='HOST',
+                      help='join the game served by HOST')
+    mode.add_argument('--loopback', action='store_true',
+                      help='measure a server and a client on this machine')
+    parser.add_argument('--port', type=int, default=NET_PORT)
+    parser.add_argument('--headless', action='store_true',
+                        help='connect without display, as a bot')
+    parser.add_argument('--frames', type=int,
+                        help='steps played, 600 for --loopback')
+    parser.add_argument('--loss', type=float, default=0.0,
+                        help='share of the snapshots the client drops')
+    parser.add_argument('--seed', type=int, help='random seed of the server')
+    parser.add_argument('--json', action='store_true',
+                        help='print the stats as JSON')
+    args = parser.parse_args()
+
+    if args.serve:
+        stats = server_stats(*serve(args.port, args.seed, args.frames))
+    elif args.connect:
+        game = RemoteGame((args.connect, args.port), headless=args.headless,
+                          max_frames=args.frames, loss=args.loss)
+        if not args.headless:
+            game.show_title()
+        if game.running:
+            game.new()
+        game.net.close()
+        stats = game.net_stats()
+    else:
+        stats = loopback(args.port, args.frames or 600, args.loss,
+                         args.seed)
+    pg.quit()
+
+    if args.json:
+        print(json.dumps(stats, indent=2))
+    elif args.loopback:
+        for side, values in stats.items():
+            print(side)
+            for key, value in values.items():
+                print("  {:<22}{:>10.4g}".format(key, value))
+    else:
+        for key, value in stats.items():
+            print("{:<22}{:>10.4g}".format(key, value))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
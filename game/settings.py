@@ -18,12 +18,30 @@ FILE_PATH = os.path.dirname('__file__')
 IMG_PATH = os.path.join(FILE_PATH, 'img')
 EXPLOD_PATH = os.path.join(IMG_PATH, 'Explosions')
 SND_PATH = os.path.join(FILE_PATH, 'snd')
+# converted graphics packed in an atlas ATLAS_WIDTH pixels wide
+CACHE_PATH = os.path.join(FILE_PATH, 'cache')
+ATLAS_WIDTH = 1024
+# sizes of the images scaled from the decoded ones, cached in the atlas
+PLAYER_SIZE = (50, 38)
+PLAYER_MINI_SIZE = (25, 19)
+EXPLOSION_SIZES = {'large': (75, 75), 'small': (32, 32)}
+# threads decoding graphics and sounds
+LOADER_WORKERS = 4
 # FONT_NAME = pg.font.match_font('arial')
 
 # WINDOW
 WIDTH = 800
 HEIGHT = 600
 
+# COLORS
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+GREY = (128, 128, 128)
+LIGHTGREY = (211, 211, 211)
+RED = (255, 0, 0)
+GREEN = (0, 128, 0)
+YELLOW = (255, 255, 0)
+
 # GAME
 LIVES = 3
 SHIELD_MAX = 100
@@ -34,6 +52,8 @@ POWER_LEVEL_TIME = 10000
 TITLE = "PYSPACEX"
 BONUS_ODD = 0.95
 RESPAWN_TIME = 3000
+MOBS_INIT = 8
+STARS = 200
 BIG_STARS_SPEED = 0.4
 BIG_STARS_SIZE = 2.2
 MEDIUM_STARS_SPEED = 0.2
@@ -42,3 +62,109 @@ SMALL_STARS_SPEED = 0.1
 SMALL_STARS_SIZE = 0.8
 SHIP_FRICTION = -0.06
 SHIP_ACCELERATION = 0.7
+
+# SOUND
+# mixer channels reserved by category, then the category of each sound
+# and how many voices of it can play at the same time
+SOUND_CHANNELS = {'weapons': 3, 'explosions': 5, 'powerups': 2}
+SOUNDS = {
+    'laser': ('weapons', 2),
+    'mobs_explode': ('explosions', 4),
+    'ship_explode': ('explosions', 1),
+    'powerup_laser': ('powerups', 1),
+    'powerup_shield': ('powerups', 1),
+}
+# volume of a single voice, raised when requests are merged, and delay
+# in ms during which a sound requested again is merged with the voice
+# already playing it
+SOUND_VOLUME = 0.6
+SOUND_MERGE_TIME = 50
+
+# SURFACES
+# blit format of each class of images: 'opaque', 'colorkey', 'rle' (run
+# length encoded colorkey) or 'alpha' (per pixel alpha), black being the
+# transparent color, see the blit_* microbenchmarks. RLE blits fastest for
+# every class, the background stays opaque as its black isn't transparent
+SURFACE_FORMATS = {
+    'background': 'opaque',
+    'player': 'rle',
+    'player_mini': 'rle',
+    'laser': 'rle',
+    'meteors': 'rle',
+    'powerups': 'rle',
+    'explosions': 'rle',
+}
+
+# CACHES
+# meteors rotations are quantized to ROTATION_STEPS angles and at most
+# ROTATION_CACHE_SIZE rotated surfaces are kept around
+ROTATION_STEPS = 64
+ROTATION_CACHE_SIZE = 2048
+# rendered strings and glyphs kept by the text renderer
+TEXT_CACHE_SIZE = 256
+
+# COLLISIONS
+# size in pixels of the broadphase grid cells
+GRID_CELL_SIZE = 64
+
+# SWARM
+# waves of at least SWARM_MOBS meteors are run by the numpy swarm engine
+# instead of one sprite per meteor and bullet
+SWARM_MOBS = 500
+
+# RENDERING
+# 'full' redraws and flips the whole screen every frame, 'dirty' only
+# redraws and presents the areas which changed, up to DIRTY_RECTS_MAX
+# rects a frame
+RENDERER = 'full'
+DIRTY_RECTS_MAX = 400
+# 'surface' draws with the RENDERER above on the display surface,
+# 'texture' draws textures with an accelerated SDL renderer, rotating
+# meteors as it draws them, and falls back to SDL's software renderer
+# which 'software' always uses. Without pygame._sdl2 frames are drawn
+# on the display surface whatever the backend
+BACKEND = 'surface'
+# texture backends draw the game at WIDTH x HEIGHT and scale it to a
+# window WINDOW_SCALE times larger
+WINDOW_SCALE = 1
+# frames drawn per second at most, 0 for no limit, the game itself
+# always plays FPS steps per second
+RENDER_FPS = 60
+# steps played at most before drawing a frame when the game lags behind
+MAX_FRAMESKIP = 5
+# sprites moving more than that many pixels in a step are not
+# interpolated when drawn between two steps
+TELEPORT = 64
+# frames are paced by sleeping until PACING_SPIN ms before they are due
+# and spinning the rest, 0 to only sleep
+PACING_SPIN = 1.0
+# frames drawn per second out of focus by a game which can't pause, at
+# least FPS / MAX_FRAMESKIP for the game to keep its pace
+IDLE_FPS = 15
+# ms static screens and paused games sleep for when no event comes
+IDLE_WAIT = 500
+
+# NETWORK
+# UDP port of the game server
+NET_PORT = 5555
+# ships of a network game, one for each of the first clients to connect
+NET_PLAYERS = 2
+# snapshots kept as delta bases, a client acknowledging an older one gets
+# a whole snapshot
+NET_HISTORY = 64
+# input states sent again in each packet until the server played them
+NET_REDUNDANCY = 8
+# input states the server queues before dropping the oldest
+NET_BACKLOG = 2
+# seconds without hearing from the other end before leaving the game
+NET_TIMEOUT = 1
+
+# TELEMETRY
+# rows of per frame metrics kept in memory, and rows handed at once to the
+# thread saving them
+TELEMETRY_CAPACITY = 4096
+TELEMETRY_BATCH = 256
+
+# PROFILING
+# frames kept by the frame profiler, also the overlay graph width
+PROFILER_FRAMES = 240
@@ -1,14 +1,16 @@
 import pygame as pg
 
-from webcolors import name_to_rgb as rgb
+from engine.Pool import Pooled
 
 
-class Bullet(pg.sprite.Sprite):
+class Bullet(Pooled, pg.sprite.Sprite):
     def __init__(self, game, x, y):
         pg.sprite.Sprite.__init__(self)
         self.image = game.laser_img
-        self.image.set_colorkey(rgb('black'))
         self.rect = self.image.get_rect()
+        self.reset(x, y)
+
+    def reset(self, x, y):
         self.rect.bottom = y
         self.rect.centerx = x
         self.speedy = -10
@@ -1,29 +1,34 @@
 import pygame as pg
 
+from engine.Pool import Pooled
 
-class Explosion(pg.sprite.Sprite):
+
+class Explosion(Pooled, pg.sprite.Sprite):
     def __init__(self, game, center, size='small'):
         pg.sprite.Sprite.__init__(self)
         self.game = game
+        self.reset(center, size)
+
+    def reset(self, center, size='small'):
+        animator = self.game.animator
         self.size = size
-        self.image = self.game.explosions_anim[size][0]
+        self.frames = animator.sequence(self.game.explosions_anim, size)
+        self.image = self.frames[0]
         self.rect = self.image.get_rect()
         self.rect.center = center
         self.frame = 0
-        self.last_update = pg.time.get_ticks()
         self.rate = 60
+        animator.after(self.rate, self.next_frame)
 
-    def update(self):
-        now = pg.time.get_ticks()
-        if now - self.last_update > self.rate:
-            self.last_update = now
-            self.frame += 1
-            if self.frame == len(self.game.explosions_anim[self.size]):
-                self.kill()
-            else:
-                # keep center at the same place so we save the
-                # center before loading the new image
-                center = self.rect.center
-                self.image = self.game.explosions_anim[self.size][self.frame]
-                self.rect = self.image.get_rect()
-                self.rect.center = center
+    def next_frame(self):
+        self.frame += 1
+        if self.frame == len(self.frames):
+            self.kill()
+        else:
+            # keep center at the same place so we save the
+            # center before loading the new image
+            center = self.rect.center
+            self.image = self.frames[self.frame]
+            self.rect = self.image.get_rect()
+            self.rect.center = center
+            self.game.animator.after(self.rate, self.next_frame)
@@ -1,41 +1,50 @@
 import pygame as pg
 import random
 
+from engine.Pool import Pooled
 from settings import *
-from webcolors import name_to_rgb as rgb
 
 
-class Mob(pg.sprite.Sprite):
+class Mob(Pooled, pg.sprite.Sprite):
     def __init__(self, game):
         self.game = game
         pg.sprite.Sprite.__init__(self)
+        self.reset()
+
+    def reset(self):
         self.image_original = random.choice(self.game.meteors_img)
-        self.image_original.set_colorkey(rgb('black'))
-        self.image = self.image_original.copy()
+        self.image = self.image_original
+        self.mask = self.game.rotation_cache.mask(self.image_original, 0)
         self.rect = self.image.get_rect()
         self.radius = int(self.rect.width * 0.85 / 2)
-        # pg.draw.circle(self.image, rgb('red'), self.rect.center, self.radius)
+        # pg.draw.circle(self.image, RED, self.rect.center, self.radius)
         self.rect.x = random.randrange(WIDTH - self.rect.width)
         self.rect.y = random.randrange(-100, -40)
         self.speedy = random.randrange(1, 8)
         self.speedx = random.randrange(-3, 3)
         self.rot = 0
+        # (image, angle) image was rotated from, for renderers which
+        # rotate as they draw
+        self.rotation = None
         self.rot_speed = random.randrange(-8, 8)
-        self.last_update = pg.time.get_ticks()
+        # a recycled mob drops the rotation timer of its previous life
+        self.game.animator.cancel(getattr(self, 'timer', None))
+        self.timer = self.game.animator.after(50, self.rotate)
 
     def rotate(self):
-        now = pg.time.get_ticks()
-        if now - self.last_update > 50:
-            self.last_update = now
-            self.rot += self.rot_speed % 360
-            new_image = pg.transform.rotate(self.image_original, self.rot)
-            old_center = self.rect.center
-            self.image = new_image
-            self.rect = self.image.get_rect()
-            self.rect.center = old_center
+        if not self.alive():
+            return
+        self.rot += self.rot_speed % 360
+        old_center = self.rect.center
+        cache = self.game.rotation_cache
+        self.image = cache.get(self.image_original, self.rot)
+        self.rotation = (self.image_original, cache.angle(self.rot))
+        self.mask = cache.mask(self.image_original, self.rot)
+        self.rect = self.image.get_rect()
+        self.rect.center = old_center
+        self.timer = self.game.animator.after(50, self.rotate)
 
     def update(self):
-        self.rotate()
         self.rect.x += self.speedx
         self.rect.y += self.speedy
         # check edges
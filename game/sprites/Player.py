@@ -1,8 +1,7 @@
 import pygame as pg
 
+from engine.Input import LEFT, RIGHT, SHOOT
 from settings import *
-from sprites.Bullet import Bullet
-from webcolors import name_to_rgb as rgb
 
 # use vector instead of regular speed/position paradigm for
 # more realistic movement
@@ -10,59 +9,59 @@ vec = pg.math.Vector2
 
 
 class Player(pg.sprite.Sprite):
-    def __init__(self, game):
+    def __init__(self, game, index=0, home=WIDTH / 2):
         pg.sprite.Sprite.__init__(self)
         self.game = game
-        self.image = pg.transform.scale(game.player_img, (50, 38))
-        self.image.set_colorkey(rgb('black'))
+        # ships of several players differ by their color and where they
+        # (re)spawn
+        self.index = index
+        self.home = home
+        self.image = game.players_img[index % len(game.players_img)]
+        self.mask = pg.mask.from_surface(self.image)
         self.rect = self.image.get_rect()
         self.radius = 20
-        # pg.draw.circle(self.image, rgb('red'), self.rect.center, self.radius)
+        # pg.draw.circle(self.image, RED, self.rect.center, self.radius)
         self.shield = SHIELD_MAX
         self.shot_delay = SHOTDELAY_INIT
-        self.last_shot_time = pg.time.get_ticks()
+        self.last_shot_time = self.game.animator.now
         self.hidden = False
-        self.hide_timer = pg.time.get_ticks()
+        self.respawn_timer = None
+        # a ship whose player left, or hasn't come yet, is out of the game
+        self.playing = True
+        # input state of the step
+        self.keys = 0
         self.lives = LIVES
         self.power_level = POWER_LEVEL_INIT
-        self.power_timer = pg.time.get_ticks()
+        self.power_timer = None
+        if self.power_level > 1:
+            self.power_timer = self.game.animator.after(POWER_LEVEL_TIME,
+                                                        self.power_down)
         # speed and position
         self.rect.bottom = HEIGHT
-        self.rect.centerx = WIDTH / 2
-        self.position = vec(WIDTH / 2, HEIGHT)
+        self.rect.centerx = home
+        self.position = vec(home, HEIGHT)
         self.acceleration = vec(0, 0)
         self.velocity = vec(0, 0)
 
     def update(self):
+        # don't do anything as long as we're hidden
         if self.hidden:
-            # replace the player at the center of screen if it was
-            # hidden after an explosion
-            if pg.time.get_ticks() - self.hide_timer > RESPAWN_TIME:
-                self.hidden = False
-                self.rect.bottom = self.position.y = HEIGHT
-                self.rect.centerx = self.position.x = WIDTH / 2
-                self.velocity.x = self.acceleration.x = 0
-            else:
-                # don't do anything else as long as we're hidden
-                return
+            return
+
+        keys = self.keys
+        if keys & SHOOT:
+            self.shoot()
+        self.move(keys)
 
+    def move(self, keys):
+        ''' play one step of the ship physics with the keys held, a
+        network client predicts its ship with it '''
         # no acceleration as long as no key has been pressed
         self.acceleration.x = 0
-
-        # return back to power_level if time is elapsed
-        if self.power_level > 1 and \
-           pg.time.get_ticks() - self.power_timer > POWER_LEVEL_TIME:
-            self.power_level -= 1
-            self.power_timer = pg.time.get_ticks()
-
-        # manage key pressed
-        keys = pg.key.get_pressed()
-        if keys[pg.K_RIGHT]:
+        if keys & RIGHT:
             self.acceleration.x = SHIP_ACCELERATION
-        if keys[pg.K_LEFT]:
+        if keys & LEFT:
             self.acceleration.x = -SHIP_ACCELERATION
-        if keys[pg.K_SPACE]:
-            self.shoot()
 
         # calculate speed/acceleration
         self.acceleration += self.velocity * SHIP_FRICTION
@@ -81,7 +80,7 @@ class Player(pg.sprite.Sprite):
         self.rect.bottom = self.position.y
 
     def shoot(self):
-        now = pg.time.get_ticks()
+        now = self.game.animator.now
 
         # can't shoot if the player is dead obviously ;o0
         if self.hidden:
@@ -90,33 +89,66 @@ class Player(pg.sprite.Sprite):
         # allow users to shoot below the delay if the laser hit
         # a mob, i.e no bullets on screen
         if now - self.last_shot_time > self.shot_delay \
-           or len(self.game.bullets.sprites()) == 0:
+           or self.game.bullets_count() == 0:
             # POWER LEVEL 1 : one bullet at a time
             if self.power_level == 1:
                 self.last_shot_time = now
-                bullet = Bullet(self.game, self.rect.centerx, self.rect.top)
-                self.game.laser_snd.play()
-                self.game.all_sprites.add(bullet)
-                self.game.bullets.add(bullet)
+                self.game.fire(self.rect.centerx, self.rect.top)
+                self.game.audio.play('laser')
 
             # POWER LEVEL 2 : two bullets at a time
             if self.power_level >= 2:
                 self.last_shot_time = now
-                bullet1 = Bullet(self.game, self.rect.left, self.rect.centery)
-                bullet2 = Bullet(self.game, self.rect.right, self.rect.centery)
-                self.game.laser_snd.play()
-                self.game.all_sprites.add(bullet1)
-                self.game.all_sprites.add(bullet2)
-                self.game.bullets.add(bullet1)
-                self.game.bullets.add(bullet2)
+                self.game.fire(self.rect.left, self.rect.centery)
+                self.game.fire(self.rect.right, self.rect.centery)
+                self.game.audio.play('laser')
 
     def powerup(self):
         self.power_level += 1
-        self.power_timer = pg.time.get_ticks()
+        # each level lasts POWER_LEVEL_TIME from the last power-up
+        self.game.animator.cancel(self.power_timer)
+        self.power_timer = self.game.animator.after(POWER_LEVEL_TIME,
+                                                    self.power_down)
+
+    def power_down(self):
+        ''' return back to the previous power level '''
+        self.power_timer = None
+        # the power level drops to 1 when the ship explodes
+        if self.power_level > 1:
+            self.power_level -= 1
+        if self.power_level > 1:
+            self.power_timer = self.game.animator.after(POWER_LEVEL_TIME,
+                                                        self.power_down)
 
     def hide(self):
-        ''' temporarily hide the player '''
+        ''' hide the player, for a while if it has lives left '''
         self.hidden = True
-        self.hide_timer = pg.time.get_ticks()
+        if self.lives:
+            self.respawn_timer = self.game.animator.after(RESPAWN_TIME,
+                                                          self.respawn)
         # move the player off screen so it can't be seen for a while
         self.rect.center = (0, 5000)
+
+    def respawn(self):
+        ''' replace the player at its home at the bottom of the screen
+        once it's been hidden for a while after an explosion '''
+        self.respawn_timer = None
+        self.hidden = False
+        self.rect.bottom = self.position.y = HEIGHT
+        self.rect.centerx = self.position.x = self.home
+        self.velocity.x = self.acceleration.x = 0
+
+    def leave(self):
+        ''' take the ship out of the game, its player is gone '''
+        self.playing = False
+        self.game.animator.cancel(self.respawn_timer)
+        self.respawn_timer = None
+        self.hidden = True
+        self.rect.center = (0, 5000)
+
+    def join(self):
+        ''' bring the ship of a new player in, if it has lives left '''
+        self.playing = True
+        if self.lives:
+            self.game.animator.cancel(self.respawn_timer)
+            self.respawn()
@@ -1,55 +1,113 @@
+import numpy as np
 import pygame as pg
 import random
-from webcolors import name_to_rgb as rgb
-from webcolors import rgb_to_name as rgb2name
 
 from settings import *
 
+# share of the stars, color, speed and size of each layer, drawn
+# from the farthest (tiny and slow) to the nearest (big and fast)
+LAYERS = (
+    (0.2, GREY, SMALL_STARS_SPEED, SMALL_STARS_SIZE),
+    (0.3, LIGHTGREY, MEDIUM_STARS_SPEED, MEDIUM_STARS_SIZE),
+    (0.5, WHITE, BIG_STARS_SPEED, BIG_STARS_SIZE),
+)
+
+
+class StarLayer(object):
+    ''' stars sharing the same color, speed and size '''
+    def __init__(self, number, color, speed, size, rng):
+        self.rng = rng
+        self.color = color
+        self.speed = speed
+        # stars are drawn as square of at least one pixel
+        self.size = max(1, int(size))
+        self.x = rng.integers(0, WIDTH, number)
+        # sub-pixel starting positions so that stars of a layer don't
+        # all move down by a pixel during the same frame
+        self.y = rng.uniform(0, HEIGHT, number).astype(np.float32)
+        # pixel positions of the last draw
+        self.drawn_x = None
+        self.drawn_y = None
+
+    def update(self):
+        # move the stars downward (y) and put the ones leaving
+        # the screen back at the top
+        self.y += self.speed
+        gone = self.y > HEIGHT
+        count = np.count_nonzero(gone)
+        if count:
+            self.x[gone] = self.rng.integers(0, WIDTH, count)
+            self.y[gone] = 0
+
+    def draw(self, pixels, color):
+        self.drawn_x = self.x.copy()
+        self.drawn_y = self.y.astype(np.intp)
+        self.fill(pixels, self.drawn_x, self.drawn_y, color)
+
+    def erase(self, pixels, color):
+        ''' paint the stars of the last draw with color, return the
+        rects of the stars which moved by a pixel since then '''
+        if self.drawn_x is None:
+            return []
+        self.fill(pixels, self.drawn_x, self.drawn_y, color)
+        moved = (self.drawn_x != self.x) | \
+            (self.drawn_y != self.y.astype(np.intp))
+        size = self.size
+        rects = [pg.Rect(x, y, size, size) for x, y in zip(
+            self.drawn_x[moved].tolist(), self.drawn_y[moved].tolist())]
+        rects.extend(pg.Rect(x, y, size, size) for x, y in zip(
+            self.x[moved].tolist(), self.y[moved].astype(int).tolist()))
+        return rects
+
+    def fill(self, pixels, x, y, color):
+        for dx in range(self.size):
+            for dy in range(self.size):
+                xs = x + dx
+                ys = y + dy
+                inside = (xs < WIDTH) & (ys < HEIGHT)
+                pixels[xs[inside], ys[inside]] = color
+
 
 class Starfield(object):
     def __init__(self, number):
-        self.stars = []
-
-        # create about 20% of tiny stars, 30% medium
-        # and keep the rest bigger
-        for n in range(int(number * 0.2)):
-            x = random.randrange(0, WIDTH)
-            y = random.randrange(0, HEIGHT)
-            self.stars.append([x, y, rgb('grey')])
-
-        for n in range(int(number * 0.3)):
-            x = random.randrange(0, WIDTH)
-            y = random.randrange(0, HEIGHT)
-            self.stars.append([x, y, rgb('lightgrey')])
-
-        for n in range(int(number * 0.5)):
-            x = random.randrange(0, WIDTH)
-            y = random.randrange(0, HEIGHT)
-            self.stars.append([x, y, rgb('white')])
-
-        random.shuffle(self.stars)
-
-    def draw_stars(self, surface):
-        for star in self.stars:
-            # move the star downward (y). Speed depends on its size
-            if rgb2name(star[2]) == 'white':
-                speed = BIG_STARS_SPEED
-                size = BIG_STARS_SIZE
-            elif rgb2name(star[2]) == 'lightgrey':
-                speed = MEDIUM_STARS_SPEED
-                size = MEDIUM_STARS_SIZE
-            else:
-                speed = SMALL_STARS_SPEED
-                size = SMALL_STARS_SIZE
-
-            star[1] += speed
-            if star[1] > HEIGHT:
-                star[0] = random.randrange(0, 800)
-                star[1] = 0
-
-            # draw the point size based on its color
-            point_to_draw = pg.Rect(star[0],
-                                    star[1],
-                                    size,
-                                    size)
-            pg.draw.rect(surface, star[2], point_to_draw)
+        # numpy generator seeded from random so seeding random is
+        # enough to get the same starfield again
+        rng = np.random.default_rng(random.getrandbits(32))
+        self.layers = [
+            StarLayer(int(number * share), color, speed, size, rng)
+            for share, color, speed, size in LAYERS
+        ]
+
+    def update(self):
+        for layer in self.layers:
+            layer.update()
+
+    def draw(self, surface, erase=False):
+        ''' draw the stars, when erase is set the previous stars are
+        first painted black and the rects of the stars which moved are
+        returned '''
+        rects = []
+        # write the stars straight into the surface pixels, 24 bits
+        # surfaces can only be accessed through a 3d array
+        if surface.get_bytesize() == 3:
+            pixels = pg.surfarray.pixels3d(surface)
+            map_rgb = tuple
+        else:
+            pixels = pg.surfarray.pixels2d(surface)
+
+            # mapped with alpha, colors may come back as negative ints
+            def map_rgb(color):
+                return surface.map_rgb(color) & 0xffffffff
+        if erase:
+            black = map_rgb(BLACK)
+            for layer in self.layers:
+                rects.extend(layer.erase(pixels, black))
+        for layer in self.layers:
+            layer.draw(pixels, map_rgb(layer.color))
+        # release the surface lock
+        del pixels
+        return rects
+
+    def draw_stars(self, surface, erase=False):
+        self.update()
+        return self.draw(surface, erase)
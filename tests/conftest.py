@@ -0,0 +1,9 @@
+import os
+import sys
+
+# the game runs from its own directory, without a display or a sound card
+GAME = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'game')
+sys.path.insert(0, GAME)
+os.chdir(GAME)
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
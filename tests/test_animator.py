@@ -0,0 +1,81 @@
+from engine.Animator import Animator
+from engine.Clock import SimClock
+
+
+def step(animator, clock, ms):
+    clock.ticks += ms
+    animator.tick()
+    animator.update()
+
+
+def test_fires_after_delay():
+    clock = SimClock()
+    animator = Animator(clock)
+    fired = []
+    animator.after(50, lambda: fired.append('a'))
+    step(animator, clock, 50)
+    # more than delay ms must have elapsed
+    assert fired == []
+    step(animator, clock, 1)
+    assert fired == ['a']
+    step(animator, clock, 100)
+    assert fired == ['a'] and animator.fired == 1
+
+
+def test_order():
+    clock = SimClock()
+    animator = Animator(clock)
+    fired = []
+    for name, delay in [('c', 30), ('a', 10), ('d', 30), ('b', 20),
+                        ('e', 30)]:
+        animator.after(delay, lambda name=name: fired.append(name))
+    # due times first, then the order timers were set in
+    step(animator, clock, 100)
+    assert fired == ['a', 'b', 'c', 'd', 'e']
+
+
+def test_cancel():
+    clock = SimClock()
+    animator = Animator(clock)
+    fired = []
+    timer = animator.after(10, lambda: fired.append('a'))
+    animator.after(10, lambda: fired.append('b'))
+    Animator.cancel(timer)
+    Animator.cancel(None)
+    step(animator, clock, 20)
+    assert fired == ['b'] and animator.fired == 1
+
+
+def test_callbacks_set_timers():
+    clock = SimClock()
+    animator = Animator(clock)
+    fired = []
+
+    def tick():
+        fired.append(animator.now)
+        animator.after(9, tick)
+    animator.after(9, tick)
+    for _ in range(5):
+        step(animator, clock, 10)
+    assert fired == [10, 20, 30, 40, 50]
+
+
+def test_already_due_fires_in_the_same_pass():
+    clock = SimClock()
+    animator = Animator(clock)
+    fired = []
+    animator.after(-5, lambda: fired.append('a'))
+    animator.update()
+    assert fired == ['a']
+
+
+def test_reset():
+    clock = SimClock()
+    animator = Animator(clock)
+    fired = []
+    animator.after(10, lambda: fired.append('a'))
+    clock.ticks = 500
+    animator.reset()
+    assert animator.now == 500
+    step(animator, clock, 100)
+    assert fired == []
@@ -0,0 +1,93 @@
+import pytest
+
+from engine.Input import FIRE, LEFT, RIGHT, SHOOT
+from engine.Net import INPUT, INPUTS, NetServer
+
+
+class Ship(object):
+    def __init__(self):
+        self.playing = True
+
+    def join(self):
+        self.playing = True
+
+    def leave(self):
+        self.playing = False
+
+
+class Game(object):
+    def __init__(self, ships):
+        self.players = [Ship() for _ in range(ships)]
+
+
+def packet(tick, *states):
+    return INPUT.pack(INPUTS, 0, tick, len(states)) + bytes(states)
+
+
+@pytest.fixture
+def server():
+    server = NetServer(0, host='127.0.0.1', backlog=4, timeout=60, seats=2)
+    yield server
+    server.close()
+
+
+def poll(server, game):
+    return [seat.poll(game, []) for seat in server.seats]
+
+
+def test_first_clients_get_a_ship(server):
+    game = Game(2)
+    first, second, third = ('a', 1), ('b', 2), ('c', 3)
+    server.inbox.extend([(packet(1, LEFT), first),
+                         (packet(1, RIGHT), second),
+                         (packet(1, SHOOT), third)])
+    assert poll(server, game) == [LEFT, RIGHT]
+    assert [seat.address for seat in server.seats] == [first, second]
+    assert server.peers[third].seat is None
+    assert [ship.playing for ship in game.players] == [True, True]
+
+
+def test_free_ship_is_out_of_the_game(server):
+    game = Game(2)
+    server.inbox.append((packet(1, LEFT), ('a', 1)))
+    assert poll(server, game) == [LEFT, 0]
+    assert [ship.playing for ship in game.players] == [True, False]
+    # the next client to come plays it
+    server.inbox.append((packet(1, RIGHT), ('b', 2)))
+    assert poll(server, game) == [LEFT, RIGHT]
+    assert game.players[1].playing
+
+
+def test_silent_client_frees_its_ship(server):
+    game = Game(2)
+    first, second, third = ('a', 1), ('b', 2), ('c', 3)
+    server.inbox.extend([(packet(1, LEFT), first),
+                         (packet(1, RIGHT), second),
+                         (packet(1, SHOOT), third)])
+    poll(server, game)
+    server.peers[first].heard -= 61
+    # the watcher only gets the ship once it sends again
+    assert poll(server, game) == [0, RIGHT]
+    assert not game.players[0].playing
+    server.inbox.append((packet(2, SHOOT | LEFT), third))
+    assert poll(server, game) == [SHOOT | LEFT, RIGHT]
+    assert server.seats[0].address == third
+    assert game.players[0].playing
+
+
+def test_inputs_in_order_once(server):
+    game = Game(2)
+    client = ('a', 1)
+    # states are sent again until acknowledged
+    server.inbox.extend([(packet(1, LEFT), client),
+                         (packet(1, LEFT, RIGHT | FIRE), client),
+                         (packet(2, RIGHT | FIRE, SHOOT), client)])
+    seat = server.seats[0]
+    assert seat.poll(game, []) == LEFT
+    assert seat.poll(game, []) == RIGHT | FIRE
+    assert seat.poll(game, []) == SHOOT
+    assert seat.input_ack == 3
+    # held without the shot when nothing new came
+    server.inbox.append((packet(4, RIGHT | FIRE), client))
+    assert seat.poll(game, []) == RIGHT | FIRE
+    assert seat.poll(game, []) == RIGHT
@@ -0,0 +1,44 @@
+import multiprocessing
+import socket
+import time
+
+from settings import NET_TIMEOUT
+from engine.Input import ScriptedInput
+import netplay
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def test_client_started_late():
+    port = free_port()
+    ready = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    server = multiprocessing.Process(target=netplay.loopback_server,
+                                     args=(port, 1, ready, results))
+    server.start()
+    assert ready.wait(30)
+    game = netplay.RemoteGame(('127.0.0.1', port), headless=True,
+                              input=ScriptedInput(lambda frame: 0),
+                              max_frames=30)
+    # as long on the title screen as the server may stay silent
+    time.sleep(NET_TIMEOUT * 1.5)
+    game.new()
+    game.net.close()
+    assert game.frame == 30
+    assert game.net.snapshots > 0
+    assert results.get(timeout=10)[0] == 'server'
+    server.join()
+
+
+def test_two_players():
+    stats = netplay.loopback(free_port(), 120, 0.0, 1)
+    clients = [stats['client 1'], stats['client 2']]
+    assert sorted(client['ship'] for client in clients) == [0, 1]
+    for client in clients:
+        assert client['steps'] == 120
+        assert client['snapshots'] > 0
+    assert stats['server']['steps'] >= 120
@@ -0,0 +1,62 @@
+import pygame as pg
+
+from engine.Pool import Pool, Pooled
+
+
+class Dot(Pooled, pg.sprite.Sprite):
+    def __init__(self, game, x):
+        pg.sprite.Sprite.__init__(self)
+        self.game = game
+        self.resets = 0
+        self.reset(x)
+
+    def reset(self, x):
+        self.x = x
+        self.resets += 1
+
+
+def test_reuses_killed_sprites():
+    game = object()
+    pool = Pool(Dot, game)
+    group = pg.sprite.Group()
+    first = pool.acquire(1)
+    group.add(first)
+    assert first.game is game and first.pool is pool
+    first.kill()
+    second = pool.acquire(2)
+    assert second is first
+    assert second.x == 2 and second.resets == 2
+    assert pool.stats() == {'hits': 1, 'misses': 1, 'live': 1, 'free': 0,
+                            'high_water': 1}
+
+
+def test_kill_releases_once():
+    pool = Pool(Dot, None)
+    group = pg.sprite.Group()
+    sprite = pool.acquire(0)
+    group.add(sprite)
+    sprite.kill()
+    # killing a dead sprite doesn't free it twice
+    sprite.kill()
+    assert pool.stats()['free'] == 1
+    assert pool.acquire(0) is sprite
+    assert pool.acquire(0) is not sprite
+
+
+def test_reuse_forgets_net_id():
+    pool = Pool(Dot, None)
+    sprite = pool.acquire(0)
+    pg.sprite.Group(sprite)
+    sprite.net_id = 7
+    sprite.kill()
+    assert pool.acquire(0).net_id is None
+
+
+def test_high_water():
+    pool = Pool(Dot, None)
+    group = pg.sprite.Group(pool.acquire(x) for x in range(3))
+    for sprite in group.sprites():
+        sprite.kill()
+    group.add(pool.acquire(x) for x in range(2))
+    assert pool.stats() == {'hits': 2, 'misses': 3, 'live': 2, 'free': 1,
+                            'high_water': 3}
@@ -0,0 +1,56 @@
+import random
+
+import pytest
+
+from engine.Replay import Replay, HEADER
+
+
+def test_round_trip():
+    rng = random.Random(3)
+    replay = Replay(seed=2 ** 40 + 5, fps=60)
+    states = []
+    for _ in range(200):
+        # runs short and long enough to need several varint bytes
+        state = rng.randrange(256)
+        states += [state] * rng.choice([1, 2, 127, 128, 300, 20000])
+    for state in states:
+        replay.append(state)
+    decoded = Replay.decode(replay.encode())
+    assert (decoded.seed, decoded.fps) == (replay.seed, replay.fps)
+    assert decoded.runs == replay.runs
+    assert len(decoded) == len(states)
+    assert list(decoded.states()) == states
+
+
+def test_run_length():
+    replay = Replay(1, 60)
+    for _ in range(60):
+        replay.append(4)
+    # a second of a key held is the state and a one byte count
+    assert replay.runs == [[4, 60]]
+    assert len(replay.encode()) == HEADER.size + 2
+
+
+def test_empty():
+    decoded = Replay.decode(Replay(1, 30).encode())
+    assert decoded.runs == [] and len(decoded) == 0
+
+
+def test_save_load(tmp_path):
+    replay = Replay(9, 60, [[1, 5], [0, 200]])
+    replay.save(str(tmp_path / 'game.psx'))
+    assert Replay.load(str(tmp_path / 'game.psx')).runs == replay.runs
+
+
+@pytest.mark.parametrize('cut', [1, HEADER.size - 1, HEADER.size + 1,
+                                 HEADER.size + 2])
+def test_truncated(cut):
+    data = Replay(1, 60, [[3, 1000]]).encode()
+    with pytest.raises(ValueError):
+        Replay.decode(data[:cut])
+
+
+def test_not_a_replay():
+    data = Replay(1, 60).encode()
+    with pytest.raises(ValueError):
+        Replay.decode(b'XXXX' + data[4:])
@@ -0,0 +1,108 @@
+import random
+
+import pytest
+
+from engine.Snapshot import Snapshot, MOB, BULLET, POWERUP, NO_SHIP
+
+
+def random_snapshot(rng, entities, ships=2):
+    players = tuple((rng.randrange(-8000, 8000), rng.randrange(-2000, 2000),
+                     rng.randrange(0, 101), rng.randrange(0, 4),
+                     rng.randrange(4)) for _ in range(ships))
+    return Snapshot(players, rng.randrange(100000), entities)
+
+
+def same(decoded, snapshot):
+    return (decoded.players, decoded.score, decoded.entities) == \
+        (snapshot.players, snapshot.score, snapshot.entities)
+
+
+def random_entity(rng):
+    return (rng.choice([MOB, BULLET, POWERUP]), rng.randrange(-200, 700),
+            rng.randrange(-200, 800), rng.randrange(0, 2000))
+
+
+def evolve(rng, entities):
+    ''' entities a step later: some gone, some new, most moved '''
+    entities = {net_id: entity for net_id, entity in entities.items()
+                if rng.random() > 0.1}
+    for net_id in list(entities):
+        kind, x, y, aux = entities[net_id]
+        if rng.random() < 0.1:
+            # a jump too long for a small move
+            x += rng.choice([-1, 1]) * rng.randrange(128, 400)
+        else:
+            x += rng.randrange(-128, 128)
+        y += rng.randrange(-128, 128)
+        if rng.random() < 0.3:
+            aux = rng.randrange(0, 2000)
+        entities[net_id] = (kind, x, y, aux)
+    for _ in range(rng.randrange(0, 10)):
+        entities[rng.randrange(1, 0x10000)] = random_entity(rng)
+    return entities
+
+
+def test_full_round_trip():
+    rng = random.Random(1)
+    snapshot = random_snapshot(rng, {net_id: random_entity(rng)
+                                     for net_id in range(1, 60)})
+    data = snapshot.encode(5, 3)
+    assert Snapshot.header(data) == (5, 0, 3, NO_SHIP)
+    assert same(Snapshot.decode(data), snapshot)
+
+
+def test_ships():
+    rng = random.Random(5)
+    for ships in range(4):
+        snapshot = random_snapshot(rng, {}, ships)
+        data = snapshot.encode(1, 7, ship=1)
+        assert Snapshot.header(data) == (1, 0, 7, 1)
+        assert same(Snapshot.decode(data), snapshot)
+
+
+def test_delta_round_trip():
+    rng = random.Random(2)
+    base = random_snapshot(rng, {net_id: random_entity(rng)
+                                 for net_id in range(1, 60)})
+    # what the other end decoded of base
+    received = Snapshot.decode(base.encode(1, 0))
+    for seq in range(2, 100):
+        snapshot = random_snapshot(rng, evolve(rng, base.entities))
+        data = snapshot.encode(seq, seq, base, seq - 1, seq % 2)
+        assert Snapshot.header(data) == (seq, seq - 1, seq, seq % 2)
+        decoded = Snapshot.decode(data, received)
+        assert same(decoded, snapshot)
+        base, received = snapshot, decoded
+
+
+def test_unchanged_costs_nothing():
+    rng = random.Random(3)
+    snapshot = random_snapshot(rng, {net_id: random_entity(rng)
+                                     for net_id in range(1, 60)})
+    full = snapshot.encode(1, 0)
+    empty = Snapshot(snapshot.players, snapshot.score, {}).encode(1, 0)
+    assert len(snapshot.encode(2, 0, snapshot, 1)) == len(empty)
+    assert len(full) > len(empty)
+
+
+def test_truncated():
+    rng = random.Random(4)
+    snapshot = random_snapshot(rng, {1: random_entity(rng)})
+    data = snapshot.encode(1, 0)
+    for cut in range(len(data)):
+        with pytest.raises(ValueError):
+            Snapshot.decode(data[:cut])
+
+
+def test_new_ids_skip_zero_and_used():
+    ids = Snapshot.ids
+    try:
+        Snapshot.ids = iter([0xfffe, 0xffff, 0x10000, 0x10001, 0x10002,
+                             0x10003])
+        used = {0xfffe, 1}
+        assert Snapshot._new_id(used) == 0xffff
+        # wrapped around past 0 and the id still in use
+        assert Snapshot._new_id(used) == 2
+        assert used == {0xfffe, 0xffff, 1, 2}
+    finally:
+        Snapshot.ids = ids
@@ -0,0 +1,89 @@
+import io
+import time
+import wave
+
+import pygame as pg
+import pytest
+
+from engine.SoundManager import SoundManager
+
+WINDOW = 80
+
+
+def silence(seconds=2):
+    ''' content of a wav file long enough to keep its voice busy '''
+    data = io.BytesIO()
+    with wave.open(data, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(22050)
+        f.writeframes(b'\0\0' * int(22050 * seconds))
+    return data.getvalue()
+
+
+class Ticks(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def audio():
+    ticks = Ticks()
+    audio = SoundManager({'a': silence(), 'b': silence()}, {'fx': 1},
+                         {'a': ('fx', 1), 'b': ('fx', 1)}, 0.5, WINDOW,
+                         ticks)
+    if not audio.start():
+        pytest.skip('no mixer')
+    yield audio, ticks
+    pg.mixer.quit()
+
+
+def test_merges_within_window(audio):
+    audio, ticks = audio
+    audio.play('a')
+    ticks.now += WINDOW - 1
+    audio.play('a')
+    assert audio.stats['a'] == {'played': 1, 'coalesced': 1, 'stolen': 0,
+                                'dropped': 0}
+    # each merged request makes the voice louder
+    channel = audio.channels['fx'][0]
+    assert channel.get_volume() == pytest.approx(0.625, abs=0.01)
+
+
+def test_restarts_past_window(audio):
+    audio, ticks = audio
+    for _ in range(3):
+        audio.play('a')
+        ticks.now += WINDOW + 120
+    # the voice of the sound is restarted rather than merged into
+    assert audio.stats['a'] == {'played': 3, 'coalesced': 0, 'stolen': 2,
+                                'dropped': 0}
+
+
+def test_steals_past_window(audio):
+    audio, ticks = audio
+    audio.play('a')
+    ticks.now += WINDOW + 1
+    audio.play('b')
+    assert audio.stats['b'] == {'played': 1, 'coalesced': 0, 'stolen': 1,
+                                'dropped': 0}
+
+
+def test_drops_within_window(audio):
+    audio, ticks = audio
+    audio.play('a')
+    ticks.now += WINDOW - 1
+    audio.play('b')
+    assert audio.stats['b'] == {'played': 0, 'coalesced': 0, 'stolen': 0,
+                                'dropped': 1}
+
+
+def test_real_time_by_default():
+    audio = SoundManager({}, {}, {}, 0.5, WINDOW)
+    first = audio.ticks()
+    time.sleep(0.02)
+    # the SDL timer isn't started, get_ticks() would stay at 0
+    assert audio.ticks() - first >= 15
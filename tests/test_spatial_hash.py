@@ -0,0 +1,56 @@
+import random
+
+import pygame as pg
+import pytest
+
+from engine.SpatialHash import SpatialHash, collide_mask
+
+
+class Box(pg.sprite.Sprite):
+    def __init__(self, rng, radius=False):
+        pg.sprite.Sprite.__init__(self)
+        width, height = rng.randint(1, 60), rng.randint(1, 60)
+        self.image = pg.Surface((width, height), pg.SRCALPHA)
+        pg.draw.ellipse(self.image, (255, 255, 255), self.image.get_rect())
+        self.mask = pg.mask.from_surface(self.image)
+        self.rect = self.image.get_rect(topleft=(rng.randint(-40, 480),
+                                                 rng.randint(-40, 600)))
+        if radius:
+            self.radius = rng.randint(1, 40)
+
+
+def scene(seed, radius=False):
+    rng = random.Random(seed)
+    group = pg.sprite.Group(Box(rng, radius) for _ in range(200))
+    return group, [Box(rng, radius) for _ in range(50)]
+
+
+@pytest.mark.parametrize('cell_size', [16, 64, 200])
+@pytest.mark.parametrize('collided, radius', [
+    (None, False),
+    (pg.sprite.collide_rect, False),
+    (pg.sprite.collide_circle, True),
+    (collide_mask, False),
+])
+def test_same_as_spritecollide(cell_size, collided, radius):
+    group, tested = scene(cell_size, radius)
+    grid = SpatialHash(cell_size)
+    grid.rebuild(group)
+    for sprite in tested:
+        assert grid.spritecollide(sprite, False, collided) == \
+            pg.sprite.spritecollide(sprite, group, False, collided)
+
+
+def test_dokill_same_as_spritecollide():
+    group, tested = scene(1)
+    expected, _ = scene(1)
+    grid = SpatialHash(64)
+    grid.rebuild(group)
+    for sprite in tested:
+        hits = grid.spritecollide(sprite, True)
+        brute = pg.sprite.spritecollide(sprite, expected, True)
+        assert [hit.rect for hit in hits] == [hit.rect for hit in brute]
+        # killed sprites are not hit again before the next rebuild
+        assert grid.spritecollide(sprite, False) == []
+    assert [sprite.rect for sprite in group] == \
+        [sprite.rect for sprite in expected]
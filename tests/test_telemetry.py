@@ -0,0 +1,64 @@
+import gzip
+import json
+import os
+
+from engine.Telemetry import Telemetry, DTYPE
+
+
+def values(frame):
+    return (frame, frame * 7 % 20000, frame % 3 == 0, frame % 12,
+            frame % 5, frame % 2, 20 + frame % 9, frame % 4, frame * 3,
+            100 - frame % 150, 1 + frame % 3)
+
+
+def record(path, frames, capacity=64, batch=16):
+    telemetry = Telemetry(path, capacity, batch)
+    for frame in range(frames):
+        telemetry.record(values(frame))
+    telemetry.close()
+    return telemetry
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'telemetry')
+    telemetry = record(path, 1000)
+    rows = Telemetry.load(path)
+    assert telemetry.saved == 1000
+    # the writer may lose rows lapped by the game, never reorder them
+    assert len(rows) == 1000 - telemetry.dropped
+    frames = rows['frame'].tolist()
+    assert frames == sorted(set(frames))
+    for row in rows.tolist():
+        assert row == tuple(int(value) for value in values(row[0]))
+
+
+def test_appends(tmp_path):
+    path = str(tmp_path / 'telemetry')
+    record(path, 30)
+    record(path, 10)
+    assert Telemetry.load(path)['frame'].tolist() == \
+        list(range(30)) + list(range(10))
+
+
+def test_cut_short(tmp_path):
+    path = str(tmp_path / 'telemetry')
+    record(path, 40, batch=10)
+    # as if the game crashed while the last batch of a column was written
+    column = os.path.join(path, 'score.gz')
+    size = os.path.getsize(column)
+    with open(column, 'r+b') as f:
+        f.truncate(size - 5)
+    rows = Telemetry.load(path)
+    assert rows['frame'].tolist() == list(range(30))
+    assert rows['score'].tolist() == [frame * 3 for frame in range(30)]
+
+
+def test_export(tmp_path):
+    path = str(tmp_path / 'telemetry')
+    record(path, 50)
+    output = str(tmp_path / 'telemetry.jsonl.gz')
+    assert Telemetry.export(path, output) == 50
+    with gzip.open(output, 'rt') as f:
+        lines = [json.loads(line) for line in f]
+    assert list(lines[7]) == list(DTYPE.names)
+    assert lines[7]['frame'] == 7 and lines[7]['score'] == 21